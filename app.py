@@ -1,59 +1,98 @@
-# app.py
-import arcade
-from game import Game
-from menu import Menu
-from constants import SCREEN_WIDTH, SCREEN_HEIGHT, FPS
-
-class Application(arcade.Window):
-    # Главный класс приложения, управляющий переключением между меню и игрой
-    def __init__(self):
-        super().__init__(SCREEN_WIDTH, SCREEN_HEIGHT, "L.A.T.E.N.D")
-        # Инициализация меню и игры
-        self.menu = Menu(self)
-        self.game = Game(self)
-        # Текущее состояние приложения
-        self.state = "menu"
-
-    # Функция обновления логики игры
-    def on_update(self, delta_time):
-        if self.state == "game":
-            self.game.update()
-
-    # Функция отрисовки текущего состояния
-    def on_draw(self):
-        if self.state == "menu":
-            self.menu.render_main_menu()
-        elif self.state == "guide":
-            self.menu.render_guide()
-        elif self.state == "game":
-            self.game.render()
-
-    # Функция обработки нажатий клавиш
-    def on_key_press(self, key, modifiers):
-        # Обработка ввода в главном меню
-        if self.state == "menu":
-            action = self.menu.handle_input(key)
-            if action == "start":
-                self.state = "game"
-                self.game.init_new_game()
-            elif action == "guide":
-                self.state = "guide"
-            elif action == "quit":
-                arcade.close_window()
-        # Обработка ввода в руководстве
-        elif self.state == "guide":
-            if self.menu.handle_guide_input(key):
-                self.state = "menu"
-        # Обработка ввода в игре
-        elif self.state == "game":
-            result = self.game.handle_input(key)
-            if result == "menu":
-                self.state = "menu"
-
-# Основная функция запуска приложения
-def main():
-    app = Application()
-    arcade.run()
-
-if __name__ == "__main__":
+# app.py
+import arcade
+from assets import AssetManager
+from game import Game
+from menu import Menu
+from tracing import span, tracer
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT, FPS, MENU_BACKGROUND, UI_FONT_PATH, UI_FONT_NAME, TRACE_FILE
+
+class Application(arcade.Window):
+    # Главный класс приложения, управляющий переключением между меню и игрой
+    def __init__(self):
+        super().__init__(SCREEN_WIDTH, SCREEN_HEIGHT, "L.A.T.E.N.D")
+        # Предзагрузка текстур и шрифтов при запуске
+        self.assets = AssetManager()
+        self.assets.preload_texture(MENU_BACKGROUND)
+        self.assets.load_font(UI_FONT_PATH, UI_FONT_NAME)
+        # Инициализация меню и игры
+        self.menu = Menu(self, self.assets)
+        self.game = Game(self, self.assets)
+        # Текущее состояние приложения
+        self.state = "menu"
+
+    # Функция обновления логики игры
+    def on_update(self, delta_time):
+        perf = self.game.perf
+        if perf.enabled:
+            perf.add("frame", delta_time)
+        with perf.timer("update"), span("on_update", "frame"):
+            if self.state == "game":
+                self.game.update()
+
+    # Функция отрисовки текущего состояния
+    def on_draw(self):
+        perf = self.game.perf
+        perf.begin_frame()
+        with perf.timer("draw"), span("on_draw", "frame"):
+            if self.state == "menu":
+                self.menu.render_main_menu()
+            elif self.state == "guide":
+                self.menu.render_guide()
+            elif self.state == "game":
+                self.game.render()
+
+    # Функция обработки нажатий клавиш
+    def on_key_press(self, key, modifiers):
+        # F3 - наложение производительности (не является действием игры)
+        if key == arcade.key.F3:
+            self.game.perf.toggle()
+            return
+        # F4 - запись трассировки, при остановке она выгружается в TRACE_FILE
+        if key == arcade.key.F4:
+            if tracer.enabled:
+                tracer.stop()
+                tracer.export_chrome_trace(TRACE_FILE)
+            else:
+                tracer.start()
+            return
+        # Обработка ввода в главном меню
+        if self.state == "menu":
+            action = self.menu.handle_input(key)
+            if action == "start":
+                self.state = "game"
+                self.game.init_new_game()
+            elif action == "load":
+                # Без сохранения остаемся в меню
+                if self.game.load_saved_game():
+                    self.state = "game"
+            elif action == "guide":
+                self.state = "guide"
+            elif action == "quit":
+                arcade.close_window()
+        # Обработка ввода в руководстве
+        elif self.state == "guide":
+            if self.menu.handle_guide_input(key):
+                self.state = "menu"
+        # Обработка ввода в игре
+        elif self.state == "game":
+            result = self.game.handle_input(key)
+            if result == "menu":
+                self.game.save_input_log()
+                self.state = "menu"
+
+    # Функция закрытия окна: журнал ввода забега сохраняется для воспроизведения
+    def on_close(self):
+        if self.state == "game":
+            self.game.save_input_log()
+        if tracer.enabled:
+            tracer.stop()
+            tracer.export_chrome_trace(TRACE_FILE)
+        super().on_close()
+
+# Основная функция запуска приложения
+def main():
+    app = Application()
+    arcade.run()
+
+if __name__ == "__main__":
     main()
\ No newline at end of file
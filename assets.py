@@ -0,0 +1,65 @@
+# assets.py
+import arcade
+
+from collections import OrderedDict
+from typing import Dict, Set
+
+
+# Класс менеджера ресурсов: загружает текстуры и шрифты один раз и хранит их
+# Предзагруженные текстуры закреплены, остальные загружаются лениво и вытесняются по бюджету памяти
+class AssetManager:
+    # param memory_budget: Бюджет памяти под незакрепленные текстуры в байтах
+    def __init__(self, memory_budget: int = 64 * 1024 * 1024):
+        self.memory_budget = memory_budget
+        self.memory_used = 0
+        # Текстуры в порядке последнего использования
+        self._textures: "OrderedDict[str, arcade.Texture]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._pinned: Set[str] = set()
+        # Путь к файлу шрифта -> имя шрифта
+        self._fonts: Dict[str, str] = {}
+
+    # Функция предзагрузки текстуры, которая не будет вытеснена
+    # param path: Путь к файлу изображения
+    def preload_texture(self, path: str) -> arcade.Texture:
+        texture = self.texture(path)
+        if path not in self._pinned:
+            self._pinned.add(path)
+            self.memory_used -= self._sizes[path]
+        return texture
+
+    # Функция получения текстуры с ленивой загрузкой
+    # param path: Путь к файлу изображения
+    def texture(self, path: str) -> arcade.Texture:
+        texture = self._textures.get(path)
+        if texture is not None:
+            self._textures.move_to_end(path)
+            return texture
+
+        texture = arcade.load_texture(path)
+        size = texture.width * texture.height * 4
+        self._textures[path] = texture
+        self._sizes[path] = size
+        self.memory_used += size
+        self._evict()
+        return texture
+
+    # Функция вытеснения давно не использованных текстур сверх бюджета
+    def _evict(self):
+        for path in list(self._textures):
+            if self.memory_used <= self.memory_budget:
+                break
+            if path in self._pinned or path == next(reversed(self._textures)):
+                continue
+            del self._textures[path]
+            self.memory_used -= self._sizes.pop(path)
+
+    # Функция загрузки шрифта (повторные вызовы не перечитывают файл)
+    # param path: Путь к файлу шрифта
+    # param font_name: Имя шрифта для отрисовки текста
+    # return: Имя шрифта
+    def load_font(self, path: str, font_name: str) -> str:
+        if path not in self._fonts:
+            arcade.load_font(path)
+            self._fonts[path] = font_name
+        return self._fonts[path]
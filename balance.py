@@ -0,0 +1,284 @@
+# balance.py
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from typing import Dict, List, Optional, Tuple
+
+from constants import Action, GameState, MAX_LEVEL, MUTATION_ACTIONS
+from game import Game
+from headless import HeadlessGame, MOVE_ACTIONS
+from pathfinding import PathFinder
+
+# Сид серии по умолчанию: одинаковые параметры дают одинаковую сводку
+BALANCE_SEED = 2024
+
+# Предельное число действий бота за забег (забег без исхода считается незавершенным)
+MAX_RUN_ACTIONS = 20000
+
+# Стоимость клона в белке, предельное число клонов бота и дальность, с которой он их создает
+CLONE_COST = 25
+BOT_MAX_CLONES = 4
+BOT_CLONE_DISTANCE = 6
+
+# Порядок предпочтения мутаций ботом (первая доступная из списка)
+BOT_MUTATION_PRIORITY = (
+    "Усиленная оболочка", "Острые шипы", "Плотная мембрана", "Агрессивный штамм",
+    "Энергетический резерв", "Защитная капсула", "Быстрая репликация",
+    "Протеиновый синтез", "РНК оптимизация", "Улучшенные рецепторы",
+)
+
+# Действие игрока по направлению шага
+STEP_ACTIONS = {(0, 1): Action.MOVE_UP, (0, -1): Action.MOVE_DOWN,
+                (-1, 0): Action.MOVE_LEFT, (1, 0): Action.MOVE_RIGHT}
+
+
+# Класс сценарного бота: идет к ближайшему врагу и атакует его, отдыхает без ATP,
+# создает клонов рядом с врагами, после зачистки уровня идет к выходу
+# Бот знает позиции всех врагов и не тратит потоки случайных чисел игры
+class BotPolicy:
+    # param seed: Сид собственных случайных шагов бота
+    def __init__(self, seed: int):
+        self.rng = random.Random(f"{seed}:bot")
+        self.pathfinder: Optional[PathFinder] = None
+        self.goal: Optional[Tuple[int, int]] = None
+        self.resting = False
+
+    # Функция выбора действия по состоянию игры
+    def __call__(self, game: Game) -> Action:
+        if game.state == GameState.LEVEL_UP:
+            return self.choose_mutation(game)
+        if game.state == GameState.PAUSED:
+            return Action.CANCEL
+
+        player = game.player
+        resources = game.resources
+        enemies = game.entities.enemies
+        nearest = min(enemies, key=lambda enemy: abs(enemy.x - player.x) + abs(enemy.y - player.y),
+                      default=None)
+        distance = abs(nearest.x - player.x) + abs(nearest.y - player.y) if nearest else None
+
+        # Отдых до половины запаса ATP, пока рядом нет врагов
+        if resources.atp == 0:
+            self.resting = True
+        elif resources.atp >= resources.max_atp // 2:
+            self.resting = False
+        if self.resting and (distance is None or distance > 1):
+            return Action.WAIT
+
+        if (distance is not None and distance <= BOT_CLONE_DISTANCE and resources.protein >= CLONE_COST
+                and len(game.entities.clones) < BOT_MAX_CLONES and self.has_free_neighbor(game)):
+            return Action.CLONE
+
+        if nearest is not None:
+            goal = (nearest.x, nearest.y)
+        elif (player.x, player.y) == game.game_map.exit_pos:
+            return Action.USE_EXIT
+        elif game.game_map.exit_pos is not None:
+            goal = game.game_map.exit_pos
+        else:
+            return self.rng.choice(MOVE_ACTIONS)
+        return self.step_towards(game, goal)
+
+    # Функция выбора мутации по списку предпочтений
+    def choose_mutation(self, game: Game) -> Action:
+        names = [mutation.name for mutation in game.available_mutations]
+        for name in BOT_MUTATION_PRIORITY:
+            if name in names:
+                return MUTATION_ACTIONS[names.index(name)]
+        return MUTATION_ACTIONS[0]
+
+    # Функция проверки свободной соседней клетки для клона
+    def has_free_neighbor(self, game: Game) -> bool:
+        player = game.player
+        return any(not game.game_map.is_blocked(player.x + dx, player.y + dy)
+                   for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy)
+
+    # Функция шага по пути к цели (в клетку врага шаг означает атаку)
+    def step_towards(self, game: Game, goal: Tuple[int, int]) -> Action:
+        if self.pathfinder is None or self.pathfinder.game_map is not game.game_map:
+            self.pathfinder = PathFinder(game.game_map)
+        # Кэш путей нужен только для неподвижной цели
+        if goal != self.goal:
+            self.pathfinder.clear()
+            self.goal = goal
+
+        player = game.player
+        path = self.pathfinder.find_path((player.x, player.y), goal)
+        if not path or len(path) < 2:
+            return self.rng.choice(MOVE_ACTIONS)
+        return STEP_ACTIONS[(path[1][0] - player.x, path[1][1] - player.y)]
+
+
+# Функция получения сида забега по номеру в серии
+def run_seed(base_seed: int, index: int) -> int:
+    return random.Random(f"{base_seed}:balance:{index}").randrange(2 ** 32)
+
+
+# Функция снимка ресурсов и здоровья игрока
+def resource_snapshot(game: Game) -> Dict[str, int]:
+    snapshot = asdict(game.resources)
+    snapshot["hp"] = game.player.stats.hp
+    snapshot["max_hp"] = game.player.stats.max_hp
+    return snapshot
+
+
+# Функция прогона одного забега ботом (выполняется в процессе пула)
+# param task: (сид забега, предельное число действий)
+# return: Исход забега и записи по пройденным уровням
+def play_run(task: Tuple[int, int]) -> dict:
+    seed, max_actions = task
+    runner = HeadlessGame()
+    runner.new_game(seed)
+    return play_game(runner, seed, max_actions)
+
+
+# Функция прогона ботом уже начатой игры
+# param runner: Безголовая игра в любом состоянии забега
+# param seed: Сид забега (он же сид бота)
+# param max_actions: Предельное число действий бота
+# return: Исход забега и записи по пройденным уровням
+def play_game(runner: HeadlessGame, seed: int, max_actions: int) -> dict:
+    game = runner.game
+    policy = BotPolicy(seed)
+
+    levels = []
+    record = {"level": game.current_level, "start_turn": game.turn_count,
+              "start": resource_snapshot(game), "mutations": []}
+    outcome = "timeout"
+    for _ in range(max_actions):
+        if game.state == GameState.GAME_OVER:
+            outcome = "death"
+            break
+        if game.state == GameState.VICTORY:
+            outcome = "victory"
+            break
+
+        level = game.current_level
+        choices = [mutation.name for mutation in game.available_mutations] \
+            if game.state == GameState.LEVEL_UP else None
+        action = policy(game)
+        end = resource_snapshot(game)
+        runner.act(action)
+
+        if choices is not None and game.state != GameState.LEVEL_UP:
+            record["mutations"].append(choices[MUTATION_ACTIONS.index(action)])
+        if game.current_level != level:
+            # Ресурсы на выходе - до ответного хода врагов нового уровня
+            levels.append(finish_level(record, game, "cleared", end))
+            if game.current_level <= MAX_LEVEL:
+                record = {"level": game.current_level, "start_turn": game.turn_count,
+                          "start": resource_snapshot(game), "mutations": []}
+            else:
+                record = None
+
+    if record is not None:
+        levels.append(finish_level(record, game, outcome, resource_snapshot(game)))
+    return {"seed": seed, "outcome": outcome, "turns": game.turn_count, "levels": levels}
+
+
+# Функция завершения записи уровня
+# param result: "cleared", "death" или "timeout"
+def finish_level(record: dict, game: Game, result: str, end: Dict[str, int]) -> dict:
+    start_turn = record.pop("start_turn")
+    record["turns"] = game.turn_count - start_turn
+    record["result"] = result
+    record["end"] = end
+    return record
+
+
+# Функция сводки по забегам: смертность, ходы, мутации и ресурсы по уровням
+def aggregate(runs: List[dict]) -> dict:
+    by_level: Dict[int, List[dict]] = {}
+    for run in runs:
+        for record in run["levels"]:
+            by_level.setdefault(record["level"], []).append(record)
+
+    levels = {}
+    for level in sorted(by_level):
+        records = by_level[level]
+        deaths = sum(record["result"] == "death" for record in records)
+        turns = [record["turns"] for record in records]
+        levels[level] = {
+            "reached": len(records),
+            "deaths": deaths,
+            "death_rate": deaths / len(records),
+            "cleared": sum(record["result"] == "cleared" for record in records),
+            "turns_mean": statistics.mean(turns),
+            "turns_median": statistics.median(turns),
+            "start": {key: statistics.mean(record["start"][key] for record in records)
+                      for key in records[0]["start"]},
+            "end": {key: statistics.mean(record["end"][key] for record in records)
+                    for key in records[0]["end"]},
+            "mutations": dict(Counter(name for record in records for name in record["mutations"])),
+        }
+
+    return {
+        "runs": len(runs),
+        "outcomes": dict(Counter(run["outcome"] for run in runs)),
+        "turns_mean": statistics.mean(run["turns"] for run in runs) if runs else 0,
+        "mutations": dict(Counter(name for run in runs for record in run["levels"]
+                                  for name in record["mutations"])),
+        "levels": levels,
+    }
+
+
+# Функция вывода сводки таблицей
+def print_summary(summary: dict):
+    print(f"Забегов: {summary['runs']}, исходы: "
+          + ", ".join(f"{name} {count}" for name, count in sorted(summary["outcomes"].items())))
+    print(f"{'ур.':>3} {'дошли':>6} {'смерти':>7} {'%':>6} {'ходы':>7}"
+          f" {'ATP':>11} {'белок':>11} {'РНК':>9} {'HP':>11}")
+    for level, stats in summary["levels"].items():
+        start, end = stats["start"], stats["end"]
+        print(f"{level:>3} {stats['reached']:>6} {stats['deaths']:>7} {stats['death_rate']:>6.1%}"
+              f" {stats['turns_mean']:>7.1f}"
+              f" {start['atp']:>5.0f}>{end['atp']:<5.0f} {start['protein']:>5.0f}>{end['protein']:<5.0f}"
+              f" {start['rna']:>4.0f}>{end['rna']:<4.0f} {start['hp']:>5.0f}>{end['hp']:<5.0f}")
+    if summary["mutations"]:
+        print("Мутации: " + ", ".join(f"{name} {count}"
+                                      for name, count in Counter(summary["mutations"]).most_common()))
+
+
+# Функция запуска серии забегов из командной строки
+# Использование: python balance.py [-n забеги] [--seed сид] [--workers процессы] [--output файл]
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Серия забегов ботом для настройки баланса")
+    parser.add_argument("-n", "--runs", type=int, default=100, help="число забегов")
+    parser.add_argument("--seed", type=int, default=BALANCE_SEED, help="сид серии")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="число процессов (1 - без пула)")
+    parser.add_argument("--max-actions", type=int, default=MAX_RUN_ACTIONS,
+                        help="предельное число действий за забег")
+    parser.add_argument("--output", help="файл для сводки и забегов в JSON")
+    args = parser.parse_args(argv)
+
+    # Сид каждого забега зависит только от сида серии и номера, поэтому
+    # результат не зависит от числа процессов
+    tasks = [(run_seed(args.seed, index), args.max_actions) for index in range(args.runs)]
+    start = time.perf_counter()
+    if args.workers <= 1:
+        runs = [play_run(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            chunksize = max(1, len(tasks) // (args.workers * 4))
+            runs = list(executor.map(play_run, tasks, chunksize=chunksize))
+    elapsed = time.perf_counter() - start
+
+    summary = aggregate(runs)
+    print_summary(summary)
+    print(f"{len(runs)} забегов за {elapsed:.1f} с")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump({"summary": summary, "runs": runs}, file, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
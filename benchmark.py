@@ -0,0 +1,355 @@
+# benchmark.py
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from constants import EntityType, TileType, MAP_WIDTH, MAP_HEIGHT, SCREEN_WIDTH
+from entities import Entity, EntityRegistry
+from game import Game
+from game_map import GameMap
+from pathfinding import PathFinder
+
+# Файл базовых результатов и допустимое замедление относительно него
+# База зависит от машины, поэтому в репозиторий не входит: ее записывают на своей машине
+# до изменений (python benchmark.py --save-baseline), а после изменений сравнивают с ней
+BASELINE_FILE = "benchmark_baseline.json"
+REGRESSION_THRESHOLD = 0.2
+
+# Сид всех замеров: каждый запуск измеряет одну и ту же работу
+BENCH_SEED = 1234
+
+# Враги для замера хода (без дендритных клеток: их подкрепления меняют число врагов)
+BENCH_ENEMY_TYPES = (EntityType.MACROPHAGE, EntityType.NEUTROPHIL, EntityType.B_CELL,
+                     EntityType.T_CELL, EntityType.MAST_CELL)
+
+# Замер: вызов или пара (подготовка состояния перед каждым вызовом, вызов)
+Bench = Union[Callable[[], None], Tuple[Callable[[], None], Callable[[], None]]]
+
+
+# Функция создания открытой арены: весь периметр - стены, внутри - пол
+# param width: Ширина карты
+# param height: Высота карты
+def make_arena(width: int, height: int) -> GameMap:
+    game_map = GameMap(width, height, generate=False)
+    floor = bytes((TileType.FLOOR,)) * (height - 2)
+    for x in range(1, width - 1):
+        game_map.tiles[x][1:height - 1] = floor
+    room = (1, 1, width - 2, height - 2)
+    game_map._mark_room(room, 0)
+    game_map.rooms.append(room)
+    game_map.tiles_version += 1
+    return game_map
+
+
+# Функция получения всех проходимых клеток карты
+def floor_cells(game_map: GameMap) -> List[Tuple[int, int]]:
+    return [(x, y) for x in range(game_map.width) for y in range(game_map.height)
+            if game_map.is_walkable(x, y)]
+
+
+# Замер генерации карты заданного размера
+def bench_mapgen(width: int, height: int) -> Callable[[], None]:
+    rng = random.Random(BENCH_SEED)
+
+    def run():
+        GameMap(width, height, rng=random.Random(rng.random()))
+    return run
+
+
+# Замер поля обзора: каждый вызов - новая позиция, поэтому расчет не пропускается
+def bench_fov(width: int, height: int, radius: int) -> Callable[[], None]:
+    game_map = GameMap(width, height, rng=random.Random(BENCH_SEED))
+    cells = floor_cells(game_map)
+    random.Random(BENCH_SEED).shuffle(cells)
+    state = {"index": 0}
+
+    def run():
+        x, y = cells[state["index"] % len(cells)]
+        state["index"] += 1
+        game_map.compute_fov(x, y, radius)
+    return run
+
+
+# Функция создания арены с заданным числом врагов для замера хода
+# param chase: Все враги видят игрока и преследуют его
+# param batched: Пакетный расчет хода врагов (enemy_kernel)
+# param clones: Число клонов рядом с игроком (каждый ищет ближайшего врага)
+def make_enemy_arena(count: int, chase: bool, batched: bool, clones: int) -> Game:
+    game = Game()
+    game.batched_enemy_ai = batched
+    game.init_new_game(BENCH_SEED)
+    game.game_map = make_arena(80, 60)
+    game.pathfinder = PathFinder(game.game_map)
+
+    # Игрок не погибает за время замера
+    player = game.player
+    player.stats.hp = player.stats.max_hp = 10 ** 9
+    player.x, player.y = game.game_map.width // 2, game.game_map.height // 2
+    game.game_map.place_entity(player)
+    game.entities = EntityRegistry([player])
+    game.scheduler.clear()
+
+    rng = random.Random(BENCH_SEED)
+    cells = [cell for cell in floor_cells(game.game_map) if cell != (player.x, player.y)]
+    for index, (x, y) in enumerate(rng.sample(cells, count)):
+        enemy = game.create_enemy(BENCH_ENEMY_TYPES[index % len(BENCH_ENEMY_TYPES)], x, y)
+        if chase:
+            enemy.stats.vision_range = game.game_map.width + game.game_map.height
+        game.entities.append(enemy)
+        game.game_map.place_entity(enemy)
+        game.scheduler.add(enemy)
+    game.resources.protein = 25 * clones
+    for _ in range(clones):
+        game.create_clone()
+    for clone in game.entities.clones:
+        clone.stats.hp = clone.stats.max_hp = 10 ** 9
+    game.game_map.compute_fov(player.x, player.y, player.stats.vision_range)
+    return game
+
+
+# Замер хода врагов на арене с заданным числом врагов (параметры - как у make_enemy_arena)
+# Ход меняет арену (враги сходятся к игроку, гибнут от клонов), поэтому каждый вызов
+# замеряет первый ход на заново построенной арене
+# return: (подготовка арены, замеряемый ход)
+def bench_enemy_turn(count: int, chase: bool = False, batched: bool = True,
+                     clones: int = 0) -> Tuple[Callable[[], None], Callable[[], None]]:
+    state = {}
+
+    def prepare():
+        state["game"] = make_enemy_arena(count, chase, batched, clones)
+
+    def run():
+        state["game"].process_enemy_turn()
+    return prepare, run
+
+
+# Замер выбора позиций спавна, когда большая часть комнат занята
+# param fill: Доля занятых клеток пола
+def bench_spawn_crowded(fill: float) -> Callable[[], None]:
+    game_map = GameMap(MAP_WIDTH, MAP_HEIGHT, rng=random.Random(BENCH_SEED))
+    rng = random.Random(BENCH_SEED)
+    cells = floor_cells(game_map)
+    for x, y in rng.sample(cells, int(len(cells) * fill)):
+        game_map.place_entity(Entity(x, y, EntityType.MACROPHAGE))
+
+    def run():
+        game_map.get_enemy_spawn_positions(30, rng)
+    return run
+
+
+# Окно для замеров отрисовки (создается один раз, без показа на экране)
+_render_window = None
+
+
+# Функция создания игры с окном во внеэкранном контексте
+# param map_size: Размер карт (None - обычные размеры)
+# return: Игра или None, если arcade недоступен
+def make_render_game(map_size: Optional[Tuple[int, int]] = None) -> Optional[Game]:
+    global _render_window
+    os.environ.setdefault("ARCADE_HEADLESS", "1")
+    try:
+        import arcade
+        if _render_window is None:
+            _render_window = arcade.Window(visible=False)
+    except Exception as error:
+        print(f"Отрисовка пропущена: {error}", file=sys.stderr)
+        return None
+
+    game = Game(_render_window)
+    game.pregenerate_levels = False
+    game.save_path = None
+    game.input_log_path = None
+    game.map_size = map_size
+    game.init_new_game(BENCH_SEED)
+    return game
+
+
+# Замер отрисовки карты
+# param scroll: Сдвигать камеру каждый кадр (слой тайлов перестраивается)
+# param map_size: Размер карты (None - обычный)
+def bench_render_map(scroll: bool, map_size: Optional[Tuple[int, int]] = None) -> Optional[Callable[[], None]]:
+    game = make_render_game(map_size)
+    if game is None:
+        return None
+    state = {"frame": 0}
+
+    def run():
+        camera_x = game.camera_x + (state["frame"] % 2 if scroll else 0)
+        state["frame"] += 1
+        game.screen.clear()
+        game.ui.render_map(game.game_map, camera_x, game.camera_y, game.player)
+        game.screen.ctx.finish()
+    return run
+
+
+# Замер отрисовки мини-карты
+def bench_render_fullmap() -> Optional[Callable[[], None]]:
+    game = make_render_game()
+    if game is None:
+        return None
+
+    def run():
+        game.screen.clear()
+        game.ui.render_fullmap(game.game_map, game.player, game.entities, SCREEN_WIDTH - 210, 10, 200, 150)
+        game.screen.ctx.finish()
+    return run
+
+
+# Набор замеров: имя -> функция подготовки, возвращающая замер (None - замер недоступен)
+BENCHMARKS: Dict[str, Callable[[], Optional[Bench]]] = {
+    "mapgen_60x40": lambda: bench_mapgen(60, 40),
+    "mapgen_120x80": lambda: bench_mapgen(120, 80),
+    "mapgen_240x160": lambda: bench_mapgen(240, 160),
+    "mapgen_500x500": lambda: bench_mapgen(500, 500),
+    "fov_60x40_r4": lambda: bench_fov(60, 40, 4),
+    "fov_60x40_r8": lambda: bench_fov(60, 40, 8),
+    "fov_60x40_r16": lambda: bench_fov(60, 40, 16),
+    "fov_240x160_r8": lambda: bench_fov(240, 160, 8),
+    "fov_240x160_r32": lambda: bench_fov(240, 160, 32),
+    "enemy_turn_10": lambda: bench_enemy_turn(10),
+    "enemy_turn_100": lambda: bench_enemy_turn(100),
+    "enemy_turn_1000": lambda: bench_enemy_turn(1000),
+    "enemy_turn_chase_300": lambda: bench_enemy_turn(300, chase=True),
+    "enemy_turn_chase_1000": lambda: bench_enemy_turn(1000, chase=True),
+    "enemy_turn_chase_1000_sequential": lambda: bench_enemy_turn(1000, chase=True, batched=False),
+    "enemy_turn_1000_clones_4": lambda: bench_enemy_turn(1000, clones=4),
+    "spawn_crowded_50": lambda: bench_spawn_crowded(0.5),
+    "spawn_crowded_90": lambda: bench_spawn_crowded(0.9),
+    "render_map": lambda: bench_render_map(False),
+    "render_map_scroll": lambda: bench_render_map(True),
+    "render_map_scroll_500x500": lambda: bench_render_map(True, (500, 500)),
+    "render_fullmap": lambda: bench_render_fullmap(),
+}
+
+
+# Функция замера времени одного вызова
+# Число вызовов в серии подбирается так, чтобы серия длилась не меньше min_time
+# param func: Замеряемый вызов
+# param repeat: Количество серий
+# param min_time: Минимальная длительность серии в секундах (без времени подготовки)
+# param prepare: Подготовка состояния перед каждым вызовом (None - вызовы подряд)
+# return: Медиана и минимум времени вызова в миллисекундах, число вызовов в серии
+def measure(func: Callable[[], None], repeat: int, min_time: float,
+            prepare: Optional[Callable[[], None]] = None) -> Dict[str, float]:
+    # Время серии из number вызовов
+    def series(number: int) -> float:
+        if prepare is None:
+            start = time.perf_counter()
+            for _ in range(number):
+                func()
+            return time.perf_counter() - start
+        elapsed = 0.0
+        for _ in range(number):
+            prepare()
+            start = time.perf_counter()
+            func()
+            elapsed += time.perf_counter() - start
+        return elapsed
+
+    if prepare is not None:
+        prepare()
+    func()
+    number = 1
+    while True:
+        elapsed = series(number)
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2
+
+    samples = [elapsed / number]
+    for _ in range(repeat - 1):
+        samples.append(series(number) / number)
+    return {
+        "median_ms": statistics.median(samples) * 1000,
+        "min_ms": min(samples) * 1000,
+        "calls": number,
+    }
+
+
+# Функция сравнения результатов с базовыми
+# return: Имена замеров, замедлившихся больше порога
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:32} {result['median_ms']:10.3f} мс" + ("   (нет в базе)" if baseline else ""))
+            continue
+        change = result["median_ms"] / base["median_ms"] - 1
+        mark = ""
+        if change > threshold:
+            mark = "  РЕГРЕССИЯ"
+            regressions.append(name)
+        print(f"{name:32} {result['median_ms']:10.3f} мс   база {base['median_ms']:10.3f} мс   {change:+7.1%}{mark}")
+    return regressions
+
+
+# Функция запуска замеров из командной строки
+# Использование: python benchmark.py [префиксы имен] [--save-baseline] [--output файл]
+# Код выхода 1 - есть регрессии относительно базы
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Замеры производительности игры")
+    parser.add_argument("names", nargs="*", help="префиксы имен замеров (по умолчанию все)")
+    parser.add_argument("--output", help="файл для результатов в JSON")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="файл базовых результатов")
+    parser.add_argument("--save-baseline", action="store_true", help="записать результаты как базовые")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="допустимое замедление (0.2 - на 20%%)")
+    parser.add_argument("--repeat", type=int, default=5, help="количество серий замера")
+    parser.add_argument("--min-time", type=float, default=0.05, help="минимальная длительность серии, с")
+    parser.add_argument("--list", action="store_true", help="показать имена замеров")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(BENCHMARKS))
+        return 0
+
+    results: Dict[str, dict] = {}
+    for name, setup in BENCHMARKS.items():
+        if args.names and not any(name.startswith(prefix) for prefix in args.names):
+            continue
+        bench = setup()
+        if bench is None:
+            continue
+        prepare, func = bench if isinstance(bench, tuple) else (None, bench)
+        results[name] = measure(func, max(1, args.repeat), args.min_time, prepare)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2, ensure_ascii=False)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2, ensure_ascii=False)
+        print(f"Базовые результаты записаны в {args.baseline}")
+
+    baseline: Dict[str, dict] = {}
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file).get("results", {})
+    elif not args.save_baseline:
+        print(f"Базовые результаты не найдены ({args.baseline}), запишите их: python benchmark.py --save-baseline")
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"Регрессии: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,24 @@
+# controls.py
+import arcade
+from constants import Action
+
+# Соответствие клавиш действиям игрока
+KEY_ACTIONS = {
+    arcade.key.UP: Action.MOVE_UP,
+    arcade.key.W: Action.MOVE_UP,
+    arcade.key.DOWN: Action.MOVE_DOWN,
+    arcade.key.S: Action.MOVE_DOWN,
+    arcade.key.LEFT: Action.MOVE_LEFT,
+    arcade.key.A: Action.MOVE_LEFT,
+    arcade.key.RIGHT: Action.MOVE_RIGHT,
+    arcade.key.D: Action.MOVE_RIGHT,
+    arcade.key.SPACE: Action.WAIT,
+    arcade.key.C: Action.CLONE,
+    arcade.key.E: Action.USE_EXIT,
+    arcade.key.ESCAPE: Action.CANCEL,
+    arcade.key.R: Action.RESTART,
+    arcade.key.Q: Action.QUIT,
+    arcade.key.NUM_1: Action.MUTATION_1,
+    arcade.key.NUM_2: Action.MUTATION_2,
+    arcade.key.NUM_3: Action.MUTATION_3,
+}
@@ -0,0 +1,124 @@
+# enemy_kernel.py
+from typing import List, Sequence, Tuple
+
+from entities import Entity
+from pathfinding import DistanceMap, UNREACHED
+
+try:
+    import numpy
+except ImportError:  # NumPy необязателен: без него работает равносильный расчет на Python
+    numpy = None
+
+# Направления шагов в порядке перебора DistanceMap.next_step
+STEP_DIRECTIONS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+# Размер волны, начиная с которого расчет идет массивами NumPy
+NUMPY_MIN_WAVE = 128
+
+# Нет кандидата шага (дополнение строки направлений)
+NO_STEP = -1
+
+# Решения волны: индекс цели (-1 - живых целей нет), квадрат расстояния до цели
+# и индексы направлений шага по полю расстояний в порядке предпочтения
+# (строка из len(STEP_DIRECTIONS) элементов, после кандидатов - NO_STEP)
+WavePlan = Tuple[List[int], List[int], List[List[int]]]
+
+
+# Функция расчета решений волны врагов: ближайшая цель и шаги к ней для всех врагов сразу
+# Оба варианта расчета (NumPy и Python) дают одинаковый результат, поэтому игра
+# не зависит от наличия NumPy. Цель выбирается как в Game.process_enemy_ai: по полю
+# расстояний, а вне поля - ближайшая живая по прямой (при равенстве - первая в списке).
+# Первый свободный кандидат шага совпадает с шагом DistanceMap.next_step
+# param enemies: Враги волны
+# param targets: Цели преследования (игрок и клоны)
+# param flow: Поле расстояний от целей
+def plan_enemy_wave(enemies: Sequence[Entity], targets: Sequence[Entity], flow: DistanceMap) -> WavePlan:
+    if numpy is not None and len(enemies) >= NUMPY_MIN_WAVE:
+        return _plan_numpy(enemies, targets, flow)
+    return _plan_python(enemies, targets, flow)
+
+
+# Функция расчета решений волны по одному врагу
+def _plan_python(enemies: Sequence[Entity], targets: Sequence[Entity], flow: DistanceMap) -> WavePlan:
+    chosen, squared, steps = [], [], []
+    for enemy in enemies:
+        x, y = enemy.x, enemy.y
+        owner = flow.owner_at(x, y)
+        if owner == UNREACHED or not targets[owner].is_alive:
+            owner = -1
+            best = 0
+            for index, target in enumerate(targets):
+                if target.is_alive:
+                    distance = (x - target.x) ** 2 + (y - target.y) ** 2
+                    if owner < 0 or distance < best:
+                        owner, best = index, distance
+        if owner < 0:
+            chosen.append(-1)
+            squared.append(0)
+            steps.append([NO_STEP] * len(STEP_DIRECTIONS))
+            continue
+
+        target = targets[owner]
+        chosen.append(owner)
+        squared.append((x - target.x) ** 2 + (y - target.y) ** 2)
+
+        candidates = []
+        current = flow.distance_at(x, y)
+        if current != UNREACHED:
+            for order, (dx, dy) in enumerate(STEP_DIRECTIONS):
+                distance = flow.distance_at(x + dx, y + dy)
+                if distance != UNREACHED and distance < current:
+                    candidates.append((distance, order))
+            candidates.sort()
+        row = [order for _, order in candidates]
+        steps.append(row + [NO_STEP] * (len(STEP_DIRECTIONS) - len(row)))
+    return chosen, squared, steps
+
+
+# Функция расчета решений волны массивами: матрица расстояний враг x цель,
+# выбор цели и соседние клетки поля для всех врагов одной операцией
+def _plan_numpy(enemies: Sequence[Entity], targets: Sequence[Entity], flow: DistanceMap) -> WavePlan:
+    np = numpy
+    count = len(enemies)
+    alive = np.fromiter((target.is_alive for target in targets), bool, len(targets))
+    if not alive.any():
+        return [-1] * count, [0] * count, [[NO_STEP] * len(STEP_DIRECTIONS) for _ in range(count)]
+
+    ex = np.fromiter((enemy.x for enemy in enemies), np.int64, count)
+    ey = np.fromiter((enemy.y for enemy in enemies), np.int64, count)
+    tx = np.fromiter((target.x for target in targets), np.int64, len(targets))
+    ty = np.fromiter((target.y for target in targets), np.int64, len(targets))
+
+    # Квадраты расстояний до всех целей, мертвые цели не выбираются
+    matrix = (ex[:, None] - tx) ** 2 + (ey[:, None] - ty) ** 2
+    nearest = np.where(alive, matrix, np.iinfo(np.int64).max).argmin(axis=1)
+
+    width, height = flow.width, flow.height
+    distances = np.array(flow.distances, np.int64)
+    owners = np.array(flow.owners, np.int64)
+
+    # Значения поля в клетках (вне окна поля - UNREACHED)
+    def lookup(grid, x, y):
+        x = x - flow.left
+        y = y - flow.bottom
+        inside = (x >= 0) & (x < width) & (y >= 0) & (y < height)
+        if not grid.size:
+            return np.full(x.shape, UNREACHED, np.int64)
+        return np.where(inside, grid[np.where(inside, x * height + y, 0)], UNREACHED)
+
+    owner = lookup(owners, ex, ey)
+    by_flow = (owner != UNREACHED) & alive[np.maximum(owner, 0)]
+    chosen = np.where(by_flow, owner, nearest)
+    squared = matrix[np.arange(count), chosen]
+
+    # Кандидаты - соседи с меньшим расстоянием, по возрастанию (расстояние, направление)
+    current = lookup(distances, ex, ey)[:, None]
+    dx = np.array([direction[0] for direction in STEP_DIRECTIONS], np.int64)
+    dy = np.array([direction[1] for direction in STEP_DIRECTIONS], np.int64)
+    neighbor = lookup(distances, ex[:, None] + dx, ey[:, None] + dy)
+    valid = (current != UNREACHED) & (neighbor != UNREACHED) & (neighbor < current)
+    directions = np.arange(len(STEP_DIRECTIONS))
+    keys = np.where(valid, neighbor * len(STEP_DIRECTIONS) + directions, np.iinfo(np.int64).max)
+    order = np.argsort(keys, axis=1, kind="stable")
+    steps = np.where(np.take_along_axis(valid, order, axis=1), order, NO_STEP)
+    return chosen.tolist(), squared.tolist(), steps.tolist()
@@ -1,80 +1,167 @@
-from dataclasses import dataclass, field
-from typing import Dict, Optional, Tuple, List
-from constants import EntityType, WHITE
-
-@dataclass
-class Stats:
-    hp: int = 100
-    max_hp: int = 100
-    attack: int = 10
-    defense: int = 5
-    speed: int = 10
-    vision_range: int = 8
-
-@dataclass
-class Resources:
-    atp: int = 100
-    protein: int = 50
-    rna: int = 0
-    max_atp: int = 100
-    max_protein: int = 100
-    max_rna: int = 50
-
-@dataclass
-class Entity:
-    x: int
-    y: int
-    entity_type: EntityType
-    stats: Stats = field(default_factory=Stats)
-    is_alive: bool = True
-    name: str = ""
-    color: Tuple[int, int, int] = WHITE
-    char: str = "?"
-    ai_state: str = "idle"
-    target: Optional['Entity'] = None
-
-    def take_damage(self, damage: int) -> int:
-        actual_damage = max(1, damage - self.stats.defense // 2)
-        self.stats.hp -= actual_damage
-        if self.stats.hp <= 0:
-            self.stats.hp = 0
-            self.is_alive = False
-        return actual_damage
-
-    def heal(self, amount: int):
-        self.stats.hp = min(self.stats.max_hp, self.stats.hp + amount)
-
-    def distance_to(self, other: 'Entity') -> float:
-        return ((self.x - other.x) ** 2 + (self.y - other.y) ** 2) ** 0.5
-
-    def distance_to_pos(self, x: int, y: int) -> float:
-        return ((self.x - x) ** 2 + (self.y - y) ** 2) ** 0.5
-
-class Mutation:
-    def __init__(self, name: str, description: str, stat_changes: Dict[str, int]):
-        self.name = name
-        self.description = description
-        self.stat_changes = stat_changes
-
-    def apply(self, entity: Entity, resources: Resources):
-        for stat, value in self.stat_changes.items():
-            if hasattr(entity.stats, stat):
-                current = getattr(entity.stats, stat)
-                setattr(entity.stats, stat, current + value)
-            elif hasattr(resources, stat):
-                current = getattr(resources, stat)
-                setattr(resources, stat, current + value)
-
-MUTATIONS = [
-    Mutation("Усиленная оболочка", "+20 макс. HP", {"max_hp": 20, "hp": 20}),
-    Mutation("Острые шипы", "+5 атака", {"attack": 5}),
-    Mutation("Плотная мембрана", "+3 защита", {"defense": 3}),
-    Mutation("Быстрая репликация", "+2 скорость", {"speed": 2}),
-    Mutation("Улучшенные рецепторы", "+2 обзор", {"vision_range": 2}),
-    Mutation("Энергетический резерв", "+30 макс. ATP", {"max_atp": 30}),
-    Mutation("Протеиновый синтез", "+30 макс. белка", {"max_protein": 30}),
-    Mutation("РНК оптимизация", "+20 макс. РНК", {"max_rna": 20}),
-    Mutation("Агрессивный штамм", "+8 атака, -10 HP", {"attack": 8, "max_hp": -10}),
-    Mutation("Защитная капсула", "+5 защита, -3 атака", {"defense": 5, "attack": -3}),
-    Mutation("Метаболизм", "+2 ко всем ресурсам", {"max_atp": 20, "max_protein": 20, "max_rna": 10}),
-]
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, KeysView, Optional, Tuple, List
+from constants import EntityType, WHITE
+
+# Стороны: игрок, его клоны и иммунная система
+FACTION_PLAYER = 0
+FACTION_VIRUS = 1
+FACTION_IMMUNE = 2
+
+
+# Функция определения стороны по типу сущности
+def faction_of(entity_type: EntityType) -> int:
+    if entity_type == EntityType.PLAYER:
+        return FACTION_PLAYER
+    if entity_type == EntityType.VIRUS_CLONE:
+        return FACTION_VIRUS
+    return FACTION_IMMUNE
+
+
+# Характеристики хранятся в слотах: без __dict__ на каждый экземпляр
+class Stats:
+    __slots__ = ("hp", "max_hp", "attack", "defense", "speed", "vision_range")
+
+    def __init__(self, hp: int = 100, max_hp: int = 100, attack: int = 10, defense: int = 5,
+                 speed: int = 10, vision_range: int = 8):
+        self.hp = hp
+        self.max_hp = max_hp
+        self.attack = attack
+        self.defense = defense
+        self.speed = speed
+        self.vision_range = vision_range
+
+    def __repr__(self) -> str:
+        return (f"Stats(hp={self.hp}, max_hp={self.max_hp}, attack={self.attack}, "
+                f"defense={self.defense}, speed={self.speed}, vision_range={self.vision_range})")
+
+@dataclass
+class Resources:
+    atp: int = 100
+    protein: int = 50
+    rna: int = 0
+    max_atp: int = 100
+    max_protein: int = 100
+    max_rna: int = 50
+
+
+# Сущность в слотах; сравнение и хеш по идентичности, поэтому сущности можно хранить в множествах
+class Entity:
+    __slots__ = ("x", "y", "entity_type", "faction", "stats", "is_alive", "name", "color", "char",
+                 "ai_state", "target")
+
+    def __init__(self, x: int, y: int, entity_type: EntityType, stats: Optional[Stats] = None,
+                 is_alive: bool = True, name: str = "", color: Tuple[int, int, int] = WHITE,
+                 char: str = "?", ai_state: str = "idle", target: Optional['Entity'] = None):
+        self.x = x
+        self.y = y
+        self.entity_type = entity_type
+        self.faction = faction_of(entity_type)
+        self.stats = stats if stats is not None else Stats()
+        self.is_alive = is_alive
+        self.name = name
+        self.color = color
+        self.char = char
+        self.ai_state = ai_state
+        self.target = target
+
+    def __repr__(self) -> str:
+        return f"Entity({self.entity_type.name}, x={self.x}, y={self.y}, hp={self.stats.hp}, alive={self.is_alive})"
+
+    def take_damage(self, damage: int) -> int:
+        actual_damage = max(1, damage - self.stats.defense // 2)
+        self.stats.hp -= actual_damage
+        if self.stats.hp <= 0:
+            self.stats.hp = 0
+            self.is_alive = False
+        return actual_damage
+
+    def heal(self, amount: int):
+        self.stats.hp = min(self.stats.max_hp, self.stats.hp + amount)
+
+    def distance_to(self, other: 'Entity') -> float:
+        return ((self.x - other.x) ** 2 + (self.y - other.y) ** 2) ** 0.5
+
+    def distance_to_pos(self, x: int, y: int) -> float:
+        return ((self.x - x) ** 2 + (self.y - y) ** 2) ** 0.5
+
+
+# Класс реестра сущностей уровня с поддерживаемыми наборами живых сущностей по сторонам
+# Наборы - словари без значений: добавление и удаление за O(1), обход в порядке появления (детерминированно)
+class EntityRegistry:
+    # param entities: Начальные сущности
+    def __init__(self, entities: Iterable[Entity] = ()):
+        # Все сущности уровня в порядке добавления, включая погибших
+        self._entities: List[Entity] = []
+        # Живые сущности по сторонам -> порядковый номер добавления
+        self._living: Tuple[Dict[Entity, int], ...] = ({}, {}, {})
+        for entity in entities:
+            self.append(entity)
+
+    def __iter__(self) -> Iterator[Entity]:
+        return iter(self._entities)
+
+    def __len__(self) -> int:
+        return len(self._entities)
+
+    # Функция добавления сущности
+    def append(self, entity: Entity):
+        self._entities.append(entity)
+        if entity.is_alive:
+            self._living[entity.faction][entity] = len(self._entities) - 1
+
+    # Функция исключения погибшей сущности из наборов живых
+    def mark_dead(self, entity: Entity):
+        self._living[entity.faction].pop(entity, None)
+
+    # Функция получения порядкового номера живой сущности (порядок обхода наборов живых)
+    # return: Номер или -1 для погибших и неизвестных сущностей
+    def order_of(self, entity: Entity) -> int:
+        return self._living[entity.faction].get(entity, -1)
+
+    # Функция получения живых сущностей стороны
+    # param faction: Сторона (FACTION_*)
+    def living(self, faction: int) -> KeysView:
+        return self._living[faction].keys()
+
+    # Живые враги (иммунные клетки)
+    @property
+    def enemies(self) -> KeysView:
+        return self._living[FACTION_IMMUNE].keys()
+
+    # Живые клоны игрока
+    @property
+    def clones(self) -> KeysView:
+        return self._living[FACTION_VIRUS].keys()
+
+    # Функция подсчета всех живых сущностей
+    def living_count(self) -> int:
+        return sum(len(living) for living in self._living)
+
+class Mutation:
+    def __init__(self, name: str, description: str, stat_changes: Dict[str, int]):
+        self.name = name
+        self.description = description
+        self.stat_changes = stat_changes
+
+    def apply(self, entity: Entity, resources: Resources):
+        for stat, value in self.stat_changes.items():
+            if hasattr(entity.stats, stat):
+                current = getattr(entity.stats, stat)
+                setattr(entity.stats, stat, current + value)
+            elif hasattr(resources, stat):
+                current = getattr(resources, stat)
+                setattr(resources, stat, current + value)
+
+MUTATIONS = [
+    Mutation("Усиленная оболочка", "+20 макс. HP", {"max_hp": 20, "hp": 20}),
+    Mutation("Острые шипы", "+5 атака", {"attack": 5}),
+    Mutation("Плотная мембрана", "+3 защита", {"defense": 3}),
+    Mutation("Быстрая репликация", "+2 скорость", {"speed": 2}),
+    Mutation("Улучшенные рецепторы", "+2 обзор", {"vision_range": 2}),
+    Mutation("Энергетический резерв", "+30 макс. ATP", {"max_atp": 30}),
+    Mutation("Протеиновый синтез", "+30 макс. белка", {"max_protein": 30}),
+    Mutation("РНК оптимизация", "+20 макс. РНК", {"max_rna": 20}),
+    Mutation("Агрессивный штамм", "+8 атака, -10 HP", {"attack": 8, "max_hp": -10}),
+    Mutation("Защитная капсула", "+5 защита, -3 атака", {"defense": 5, "attack": -3}),
+    Mutation("Метаболизм", "+2 ко всем ресурсам", {"max_atp": 20, "max_protein": 20, "max_rna": 10}),
+]
@@ -0,0 +1,130 @@
+# fov.py
+from constants import TileType
+
+from typing import Dict, List, Tuple
+
+
+# Множители преобразования координат для восьми октантов (xx, xy, yx, yy)
+OCTANTS = (
+    (1, 0, 0, 1),
+    (0, 1, 1, 0),
+    (0, -1, 1, 0),
+    (-1, 0, 0, 1),
+    (-1, 0, 0, -1),
+    (0, -1, -1, 0),
+    (0, 1, -1, 0),
+    (1, 0, 0, -1),
+)
+
+# Кэш таблиц октантов по радиусу
+_octant_tables: Dict[int, List[List[tuple]]] = {}
+
+
+# Функция получения предрасчитанной таблицы октанта для радиуса
+# param radius: Радиус обзора
+# return: Строки октанта, каждая клетка - (dx, dy, левый наклон, правый наклон, в радиусе)
+def get_octant_table(radius: int) -> List[List[tuple]]:
+    table = _octant_tables.get(radius)
+    if table is None:
+        radius_squared = radius * radius
+        table = []
+        for j in range(1, radius + 1):
+            dy = -j
+            row = []
+            for dx in range(-j, 1):
+                l_slope = (dx - 0.5) / (dy + 0.5)
+                r_slope = (dx + 0.5) / (dy - 0.5)
+                row.append((dx, dy, l_slope, r_slope, dx * dx + dy * dy <= radius_squared))
+            table.append(row)
+        _octant_tables[radius] = table
+    return table
+
+
+# Функция расчета видимых клеток рекурсивным отбрасыванием теней
+# param tiles: Сетка тайлов карты (tiles[x][y])
+# param width: Ширина карты
+# param height: Высота карты
+# param origin_x: X координата наблюдателя
+# param origin_y: Y координата наблюдателя
+# param radius: Радиус обзора
+# return: Список видимых клеток (возможны повторы на границах октантов)
+def compute_visible_cells(tiles, width: int, height: int,
+                          origin_x: int, origin_y: int, radius: int) -> List[Tuple[int, int]]:
+    cells = [(origin_x, origin_y)]
+    if radius <= 0:
+        return cells
+
+    table = get_octant_table(radius)
+    for xx, xy, yx, yy in OCTANTS:
+        _cast_light(tiles, width, height, origin_x, origin_y, table,
+                    1, 1.0, 0.0, xx, xy, yx, yy, cells)
+    return cells
+
+
+# Функция обхода одного октанта, начиная со строки row между наклонами start и end
+def _cast_light(tiles, width: int, height: int, origin_x: int, origin_y: int, table: List[List[tuple]],
+                row: int, start: float, end: float, xx: int, xy: int, yx: int, yy: int,
+                cells: List[Tuple[int, int]]):
+    if start < end:
+        return
+
+    radius = len(table)
+    new_start = start
+    for j in range(row, radius + 1):
+        blocked = False
+        for dx, dy, l_slope, r_slope, in_radius in table[j - 1]:
+            if start < r_slope:
+                continue
+            if end > l_slope:
+                break
+
+            x = origin_x + dx * xx + dy * xy
+            y = origin_y + dx * yx + dy * yy
+
+            # Клетки за границей карты считаются стеной
+            if 0 <= x < width and 0 <= y < height:
+                opaque = tiles[x][y] == TileType.WALL
+                if in_radius:
+                    cells.append((x, y))
+            else:
+                opaque = True
+
+            if blocked:
+                if opaque:
+                    new_start = r_slope
+                else:
+                    blocked = False
+                    start = new_start
+            elif opaque and j < radius:
+                # Начало тени: просматриваем часть октанта до препятствия
+                blocked = True
+                _cast_light(tiles, width, height, origin_x, origin_y, table,
+                            j + 1, start, l_slope, xx, xy, yx, yy, cells)
+                new_start = r_slope
+
+        if blocked:
+            break
+
+
+# Функция проверки прямой видимости по линии Брезенхэма
+# Стены проверяются только в промежуточных клетках, концы линии не учитываются
+# param tiles: Сетка тайлов карты (tiles[x][y])
+# return: True, если между клетками нет стен
+def line_is_clear(tiles, x0: int, y0: int, x1: int, y1: int) -> bool:
+    dx = abs(x1 - x0)
+    dy = -abs(y1 - y0)
+    sx = 1 if x0 < x1 else -1
+    sy = 1 if y0 < y1 else -1
+    error = dx + dy
+    x, y = x0, y0
+    while x != x1 or y != y1:
+        doubled = 2 * error
+        if doubled >= dy:
+            error += dy
+            x += sx
+        if doubled <= dx:
+            error += dx
+            y += sy
+        if (x != x1 or y != y1) and tiles[x][y] == TileType.WALL:
+            return False
+    return True
@@ -1,235 +1,378 @@
-import random
-import math
-import arcade
-from constants import TileType, MAP_WIDTH, MAP_HEIGHT
-from entities import Entity
-
-from typing import List, Optional, Tuple, Dict
-
-
-# Класс игровой карты с процедурной генерацией
-class GameMap:
-    def __init__(self, width: int = MAP_WIDTH, height: int = MAP_HEIGHT, level: int = 1):
-        self.width = width
-        self.height = height
-        self.level = level
-        self.tiles = [[TileType.WALL for _ in range(height)] for _ in range(width)]
-        self.visible = [[False for _ in range(height)] for _ in range(width)]
-        self.explored = [[False for _ in range(height)] for _ in range(width)]
-        self.damage_zones: List[List] = []  # [x, y, damage, turns_left]
-        self.rooms: List[tuple] = []        # (x, y, w, h)
-        self.exit_pos: Optional[Tuple[int, int]] = None
-        self.generate()
-
-    # Генерация случайной карты с комнатами и коридорами
-    def generate(self):
-        self.rooms = []
-        num_rooms = random.randint(8, 12)
-
-        # Создание непересекающихся комнат
-        for _ in range(num_rooms * 10):
-            if len(self.rooms) >= num_rooms:
-                break
-
-            w = random.randint(6, 12)
-            h = random.randint(6, 10)
-            x = random.randint(1, self.width - w - 1)
-            y = random.randint(1, self.height - h - 1)
-
-            new_room = (x, y, w, h)
-
-            # Проверка пересечения с другими комнатами
-            overlaps = False
-            for room in self.rooms:
-                if self._rooms_collide(new_room, room):
-                    overlaps = True
-                    break
-
-            if not overlaps:
-                self.rooms.append(new_room)
-                self._create_room(new_room)
-
-        # Соединение комнат коридорами
-        for i in range(len(self.rooms) - 1):
-            center1 = self._room_center(self.rooms[i])
-            center2 = self._room_center(self.rooms[i+1])
-            self._create_corridor(center1, center2)
-
-        # Добавление кровеносных сосудов на ранних уровнях
-        if self.level <= 3:
-            self._add_blood_vessels()
-
-        # Установка выхода в последней комнате
-        if self.rooms:
-            last_room = self.rooms[-1]
-            self.exit_pos = (last_room[0]+last_room[2]//2, last_room[1]+last_room[3]//2)
-            self.tiles[self.exit_pos[0]][self.exit_pos[1]] = TileType.EXIT
-
-    # Проверка пересечения двух комнат
-    def _rooms_collide(self, room1: tuple, room2: tuple) -> bool:
-        x1, y1, w1, h1 = room1
-        x2, y2, w2, h2 = room2
-        return (x1+w1 > x2 and x1 < x2+w2 and y1+h1 > y2 and y1 < y2+h2)
-
-    # Получение центра комнаты
-    def _room_center(self, room: tuple) -> tuple:
-        x, y, w, h = room
-        return (x+w//2, y+h//2)
-
-    # Создание комнаты на карте
-    def _create_room(self, room: tuple):
-        x, y, w, h = room
-        for xi in range(x, x+w):
-            for yi in range(y, y+h):
-                if 0 <= xi < self.width and 0 <= yi < self.height:
-                    self.tiles[xi][yi] = TileType.FLOOR
-
-    # Создание коридора между двумя точками
-    def _create_corridor(self, pos1: tuple, pos2: tuple):
-        x1, y1 = pos1
-        x2, y2 = pos2
-
-        # Случайный выбор направления
-        if random.random() < 0.5:
-            self._create_h_tunnel(x1, x2, y1)
-            self._create_v_tunnel(y1, y2, x2)
-        else:
-            self._create_v_tunnel(y1, y2, x1)
-            self._create_h_tunnel(x1, x2, y2)
-
-    # Горизонтальный туннель
-    def _create_h_tunnel(self, x1: int, x2: int, y: int):
-        for x in range(min(x1, x2), max(x1, x2)+1):
-            if 0 <= x < self.width and 0 <= y < self.height:
-                if self.tiles[x][y] == TileType.WALL:
-                    self.tiles[x][y] = TileType.FLOOR
-
-    # Вертикальный туннель
-    def _create_v_tunnel(self, y1: int, y2: int, x: int):
-        for y in range(min(y1, y2), max(y1, y2)+1):
-            if 0 <= x < self.width and 0 <= y < self.height:
-                if self.tiles[x][y] == TileType.WALL:
-                    self.tiles[x][y] = TileType.FLOOR
-
-    # Добавление кровеносных сосудов
-    def _add_blood_vessels(self):
-        for room in self.rooms:
-            if random.random() < 0.3:
-                if random.random() < 0.5:
-                    y = room[1] + room[3]//2
-                    for x in range(room[0], room[0]+room[2]):
-                        if self.tiles[x][y] == TileType.FLOOR:
-                            self.tiles[x][y] = TileType.BLOOD_VESSEL
-                else:
-                    x = room[0] + room[2]//2
-                    for y in range(room[1], room[1]+room[3]):
-                        if self.tiles[x][y] == TileType.FLOOR:
-                            self.tiles[x][y] = TileType.BLOOD_VESSEL
-
-    # Проверка проходимости клетки
-    def is_walkable(self, x: int, y: int) -> bool:
-        if 0 <= x < self.width and 0 <= y < self.height:
-            return self.tiles[x][y] != TileType.WALL
-        return False
-
-    # Проверка блокировки клетки сущностями
-    def is_blocked(self, x: int, y: int, entities: List[Entity]) -> bool:
-        if not self.is_walkable(x, y):
-            return True
-        for entity in entities:
-            if entity.is_alive and entity.x == x and entity.y == y:
-                return True
-        return False
-
-    # Получение сущности в указанной клетке
-    def get_entity_at(self, x: int, y: int, entities: List[Entity]) -> Optional[Entity]:
-        for entity in entities:
-            if entity.is_alive and entity.x == x and entity.y == y:
-                return entity
-        return None
-
-    # Расчет поля обзора из заданной точки
-    def compute_fov(self, origin_x: int, origin_y: int, radius: int):
-        for x in range(self.width):
-            for y in range(self.height):
-                self.visible[x][y] = False
-
-        # Трассировка лучей по 360 градусам
-        for angle in range(360):
-            rad = math.radians(angle)
-            dx = math.cos(rad)
-            dy = math.sin(rad)
-
-            x, y = float(origin_x), float(origin_y)
-
-            for _ in range(radius):
-                ix, iy = round(x), round(y)
-
-                if 0 <= ix < self.width and 0 <= iy < self.height:
-                    self.visible[ix][iy] = True
-                    self.explored[ix][iy] = True
-
-                    if self.tiles[ix][iy] == TileType.WALL:
-                        break
-                else:
-                    break
-
-                x += dx * 0.5
-                y += dy * 0.5
-
-    # Добавление зоны урона
-    def add_damage_zone(self, x: int, y: int, damage: int, duration: int):
-        self.damage_zones.append([x, y, damage, duration])
-
-    # Обновление длительности зон урона
-    def update_damage_zones(self):
-        self.damage_zones = [[x, y, d, t - 1] for x, y, d, t in self.damage_zones if t > 1]
-
-    # Получение урона в клетке от зон
-    def get_damage_at(self, x: int, y: int) -> int:
-        total = 0
-        for zx, zy, damage, _ in self.damage_zones:
-            if zx == x and zy == y:
-                total += damage
-        return total
-
-    # Позиция спавна игрока (первая комната)
-    def get_spawn_position(self) -> Tuple[int, int]:
-        if self.rooms:
-            room = self.rooms[0]
-            return room[0]+room[2]//2, room[1]+room[3]//2
-        return 5, 5
-
-    # Позиции для спавна врагов
-    def get_enemy_spawn_positions(self, count: int, entities: List[Entity]) -> List[Tuple[int, int]]:
-        positions = []
-
-        if len(self.rooms) <= 1:
-            return positions
-
-        for _ in range(count * 5):
-            if len(positions) >= count:
-                break
-
-            room = random.choice(self.rooms[1:])
-
-            for _ in range(10):
-                x = random.randint(room[0]+1, room[0]+room[2]-2)
-                y = random.randint(room[1]+1, room[1]+room[3]-2)
-
-                if self.exit_pos and (x, y) == self.exit_pos:
-                    continue
-
-                if not self.is_blocked(x, y, entities):
-                    # Проверка минимального расстояния между врагами
-                    too_close = False
-                    for px, py in positions:
-                        if abs(px-x) <= 1 and abs(py-y) <= 1:
-                            too_close = True
-                            break
-
-                    if not too_close:
-                        positions.append((x, y))
-                        break
-
-        return positions
+import random
+from constants import TileType, MAP_WIDTH, MAP_HEIGHT
+from entities import Entity
+from fov import compute_visible_cells, line_is_clear
+from grid import make_grid
+from spatial import SpatialHash
+from tracing import traced
+
+from typing import Iterable, List, Optional, Set, Tuple, Dict
+
+# Таблица перекодировки тайлов в маску проходимости
+WALKABLE_TABLE = bytes(0 if code == TileType.WALL else 1 for code in range(256))
+
+# Значение в таблице комнат для клеток вне комнат (коридоры и стены)
+NO_ROOM = 255
+
+# Предельный размер кэша прямой видимости (при переполнении кэш очищается)
+LOS_CACHE_LIMIT = 1 << 16
+
+
+# Класс игровой карты с процедурной генерацией
+class GameMap:
+    def __init__(self, width: int = MAP_WIDTH, height: int = MAP_HEIGHT, level: int = 1,
+                 rng: Optional[random.Random] = None, generate: bool = True):
+        self.width = width
+        self.height = height
+        self.level = level
+        # Поток случайных чисел генерации карты
+        self.rng = rng or random.Random()
+        # Сетки хранятся в плоских буферах (большие карты - чанками), доступ tiles[x][y] сохранен
+        self.tiles = make_grid(width, height, TileType.WALL)
+        self.visible = make_grid(width, height, False, "?")
+        self.explored = make_grid(width, height, False, "?")
+        # Зоны урона: суммарный урон по клетке и корзины истечения по номеру хода
+        self.damage_zones: Dict[Tuple[int, int], int] = {}
+        self._zone_expiry: Dict[int, List[Tuple[int, int, int]]] = {}
+        self.zone_turn = 0
+        self.rooms: List[tuple] = []        # (x, y, w, h)
+        # Индекс комнаты для каждой клетки (NO_ROOM - вне комнат)
+        self.room_lookup = make_grid(width, height, NO_ROOM)
+        # Исследованные комнаты и клетки, впервые исследованные с последнего запроса
+        self.explored_rooms: Set[int] = set()
+        self.newly_explored: List[Tuple[int, int]] = []
+        self.exit_pos: Optional[Tuple[int, int]] = None
+        # Индекс занятости клеток живыми сущностями
+        self.occupancy: Dict[Tuple[int, int], Entity] = {}
+        # Пространственный индекс живых сущностей по сторонам для запросов по радиусу
+        self.spatial = SpatialHash()
+        # Версии увеличиваются при изменении тайлов, видимости и зон урона
+        self.tiles_version = 0
+        self.visibility_version = 0
+        self.zones_version = 0
+        # Состояние последнего расчета поля обзора
+        self._fov_key: Optional[tuple] = None
+        self._visible_cells: List[Tuple[int, int]] = []
+        # Кэш прямой видимости между парами клеток для версии тайлов _los_version
+        self._los_cache: Dict[Tuple[int, int, int, int], bool] = {}
+        self._los_version = -1
+        # Пустая карта нужна при загрузке сохранения
+        if generate:
+            self.generate()
+
+    # Генерация случайной карты с комнатами и коридорами
+    def generate(self):
+        self.rooms = []
+        self.room_lookup.fill(NO_ROOM)
+        # Число комнат растет с площадью карты (на стандартной карте - 8-12)
+        scale = max(1, self.width * self.height // (MAP_WIDTH * MAP_HEIGHT))
+        num_rooms = min(NO_ROOM, self.rng.randint(8, 12) * scale)
+
+        # Создание непересекающихся комнат
+        for _ in range(num_rooms * 10):
+            if len(self.rooms) >= num_rooms:
+                break
+
+            w = self.rng.randint(6, 12)
+            h = self.rng.randint(6, 10)
+            x = self.rng.randint(1, self.width - w - 1)
+            y = self.rng.randint(1, self.height - h - 1)
+
+            new_room = (x, y, w, h)
+
+            # Проверка пересечения с другими комнатами
+            overlaps = False
+            for room in self.rooms:
+                if self._rooms_collide(new_room, room):
+                    overlaps = True
+                    break
+
+            if not overlaps and len(self.rooms) < NO_ROOM:
+                self._mark_room(new_room, len(self.rooms))
+                self.rooms.append(new_room)
+                self._create_room(new_room)
+
+        # Соединение комнат коридорами
+        for i in range(len(self.rooms) - 1):
+            center1 = self._room_center(self.rooms[i])
+            center2 = self._room_center(self.rooms[i+1])
+            self._create_corridor(center1, center2)
+
+        # Добавление кровеносных сосудов на ранних уровнях
+        if self.level <= 3:
+            self._add_blood_vessels()
+
+        # Установка выхода в последней комнате
+        if self.rooms:
+            last_room = self.rooms[-1]
+            self.exit_pos = (last_room[0]+last_room[2]//2, last_room[1]+last_room[3]//2)
+            self.tiles[self.exit_pos[0]][self.exit_pos[1]] = TileType.EXIT
+
+        self.tiles_version += 1
+
+    # Изменение тайла во время игры (сбрасывает кэш поля обзора)
+    def set_tile(self, x: int, y: int, tile: TileType):
+        if self.tiles[x][y] != tile:
+            self.tiles[x][y] = tile
+            self.tiles_version += 1
+
+    # Проверка пересечения двух комнат
+    def _rooms_collide(self, room1: tuple, room2: tuple) -> bool:
+        x1, y1, w1, h1 = room1
+        x2, y2, w2, h2 = room2
+        return (x1+w1 > x2 and x1 < x2+w2 and y1+h1 > y2 and y1 < y2+h2)
+
+    # Получение центра комнаты
+    def _room_center(self, room: tuple) -> tuple:
+        x, y, w, h = room
+        return (x+w//2, y+h//2)
+
+    # Запись индекса комнаты в таблицу комнат
+    def _mark_room(self, room: tuple, index: int):
+        x, y, w, h = room
+        y0, y1 = max(0, y), min(self.height, y+h)
+        if y0 >= y1:
+            return
+        marks = bytes([index]) * (y1 - y0)
+        for xi in range(max(0, x), min(self.width, x+w)):
+            self.room_lookup[xi][y0:y1] = marks
+
+    # Получение индекса комнаты в клетке
+    # return: Индекс в списке rooms или None для коридоров и стен
+    def get_room_at(self, x: int, y: int) -> Optional[int]:
+        if 0 <= x < self.width and 0 <= y < self.height:
+            index = self.room_lookup[x][y]
+            if index != NO_ROOM:
+                return index
+        return None
+
+    # Получение клеток, впервые исследованных с прошлого вызова
+    def pop_newly_explored(self) -> List[Tuple[int, int]]:
+        cells = self.newly_explored
+        self.newly_explored = []
+        return cells
+
+    # Создание комнаты на карте
+    def _create_room(self, room: tuple):
+        x, y, w, h = room
+        y0, y1 = max(0, y), min(self.height, y+h)
+        if y0 >= y1:
+            return
+        floor = bytes([TileType.FLOOR]) * (y1 - y0)
+        for xi in range(max(0, x), min(self.width, x+w)):
+            self.tiles[xi][y0:y1] = floor
+
+    # Создание коридора между двумя точками
+    def _create_corridor(self, pos1: tuple, pos2: tuple):
+        x1, y1 = pos1
+        x2, y2 = pos2
+
+        # Случайный выбор направления
+        if self.rng.random() < 0.5:
+            self._create_h_tunnel(x1, x2, y1)
+            self._create_v_tunnel(y1, y2, x2)
+        else:
+            self._create_v_tunnel(y1, y2, x1)
+            self._create_h_tunnel(x1, x2, y2)
+
+    # Горизонтальный туннель
+    def _create_h_tunnel(self, x1: int, x2: int, y: int):
+        for x in range(min(x1, x2), max(x1, x2)+1):
+            if 0 <= x < self.width and 0 <= y < self.height:
+                if self.tiles[x][y] == TileType.WALL:
+                    self.tiles[x][y] = TileType.FLOOR
+
+    # Вертикальный туннель
+    def _create_v_tunnel(self, y1: int, y2: int, x: int):
+        for y in range(min(y1, y2), max(y1, y2)+1):
+            if 0 <= x < self.width and 0 <= y < self.height:
+                if self.tiles[x][y] == TileType.WALL:
+                    self.tiles[x][y] = TileType.FLOOR
+
+    # Добавление кровеносных сосудов
+    def _add_blood_vessels(self):
+        for room in self.rooms:
+            if self.rng.random() < 0.3:
+                if self.rng.random() < 0.5:
+                    y = room[1] + room[3]//2
+                    for x in range(room[0], room[0]+room[2]):
+                        if self.tiles[x][y] == TileType.FLOOR:
+                            self.tiles[x][y] = TileType.BLOOD_VESSEL
+                else:
+                    x = room[0] + room[2]//2
+                    for y in range(room[1], room[1]+room[3]):
+                        if self.tiles[x][y] == TileType.FLOOR:
+                            self.tiles[x][y] = TileType.BLOOD_VESSEL
+
+    # Маска проходимости: 1 для проходимых клеток, 0 для стен
+    def walkable_mask(self) -> bytearray:
+        return self.tiles.translate(WALKABLE_TABLE)
+
+    # Маска проходимости прямоугольного окна карты (по столбцам, как walkable_mask)
+    def walkable_window(self, x0: int, y0: int, x1: int, y1: int) -> bytearray:
+        return self.tiles.window(x0, y0, x1, y1).translate(WALKABLE_TABLE)
+
+    # Проверка проходимости клетки
+    def is_walkable(self, x: int, y: int) -> bool:
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.tiles[x][y] != TileType.WALL
+        return False
+
+    # Проверка блокировки клетки стеной или сущностью
+    def is_blocked(self, x: int, y: int) -> bool:
+        if not self.is_walkable(x, y):
+            return True
+        return (x, y) in self.occupancy
+
+    # Получение сущности в указанной клетке
+    def get_entity_at(self, x: int, y: int) -> Optional[Entity]:
+        return self.occupancy.get((x, y))
+
+    # Размещение сущности в индексе занятости
+    def place_entity(self, entity: Entity):
+        self.occupancy[(entity.x, entity.y)] = entity
+        self.spatial.insert(entity)
+
+    # Перемещение сущности с обновлением индекса занятости
+    def move_entity(self, entity: Entity, x: int, y: int):
+        if self.occupancy.get((entity.x, entity.y)) is entity:
+            del self.occupancy[(entity.x, entity.y)]
+        entity.x, entity.y = x, y
+        self.occupancy[(x, y)] = entity
+        self.spatial.update(entity)
+
+    # Обмен позициями двух сущностей
+    def swap_entities(self, first: Entity, second: Entity):
+        first.x, first.y, second.x, second.y = second.x, second.y, first.x, first.y
+        self.occupancy[(first.x, first.y)] = first
+        self.occupancy[(second.x, second.y)] = second
+        self.spatial.update(first)
+        self.spatial.update(second)
+
+    # Удаление сущности из индекса (при гибели)
+    def remove_entity(self, entity: Entity):
+        if self.occupancy.get((entity.x, entity.y)) is entity:
+            del self.occupancy[(entity.x, entity.y)]
+        self.spatial.remove(entity)
+
+    # Расчет поля обзора из заданной точки
+    @traced(category="fov")
+    def compute_fov(self, origin_x: int, origin_y: int, radius: int):
+        # Пересчет не нужен, если наблюдатель и стены не изменились
+        fov_key = (origin_x, origin_y, radius, self.tiles_version)
+        if fov_key == self._fov_key:
+            return
+
+        # Сбрасываем только клетки, видимые на прошлом ходу (после изменения карты - всю сетку)
+        if self._fov_key is None or self._fov_key[3] != self.tiles_version:
+            self.visible.fill(False)
+        else:
+            for x, y in self._visible_cells:
+                self.visible[x][y] = False
+        self._fov_key = fov_key
+
+        self._visible_cells = compute_visible_cells(self.tiles, self.width, self.height,
+                                                    origin_x, origin_y, radius)
+        for x, y in self._visible_cells:
+            self.visible[x][y] = True
+            if not self.explored[x][y]:
+                self.explored[x][y] = True
+                self.newly_explored.append((x, y))
+                room = self.room_lookup[x][y]
+                if room != NO_ROOM:
+                    self.explored_rooms.add(room)
+        self.visibility_version += 1
+
+    # Получение видимых сущностей сторон: кандидаты берутся из пространственного индекса
+    # в радиусе последнего расчета обзора, а не перебором всех сущностей уровня
+    # return: Сущности по возрастанию расстояния до наблюдателя
+    def visible_entities(self, factions: Iterable[int]) -> List[Entity]:
+        if self._fov_key is None:
+            return []
+        origin_x, origin_y, radius, _ = self._fov_key
+        return [entity for entity in self.spatial.in_radius(origin_x, origin_y, radius, factions)
+                if self.visible[entity.x][entity.y]]
+
+    # Проверка прямой видимости между клетками (стены в промежуточных клетках закрывают обзор)
+    # Луч всегда строится от меньшей клетки пары, поэтому проверка симметрична;
+    # результаты запоминаются до изменения тайлов
+    def has_line_of_sight(self, x0: int, y0: int, x1: int, y1: int) -> bool:
+        if self._los_version != self.tiles_version or len(self._los_cache) >= LOS_CACHE_LIMIT:
+            self._los_cache.clear()
+            self._los_version = self.tiles_version
+        key = (x0, y0, x1, y1) if (x0, y0) <= (x1, y1) else (x1, y1, x0, y0)
+        clear = self._los_cache.get(key)
+        if clear is None:
+            clear = self._los_cache[key] = line_is_clear(self.tiles, *key)
+        return clear
+
+    # Добавление зоны урона
+    def add_damage_zone(self, x: int, y: int, damage: int, duration: int):
+        cell = (x, y)
+        self.damage_zones[cell] = self.damage_zones.get(cell, 0) + damage
+        # Зона попадает в корзину хода, на котором истечет
+        expiry = self.zone_turn + max(1, duration)
+        self._zone_expiry.setdefault(expiry, []).append((x, y, damage))
+        self.zones_version += 1
+
+    # Обновление длительности зон урона
+    def update_damage_zones(self):
+        self.zone_turn += 1
+        expired = self._zone_expiry.pop(self.zone_turn, None)
+        if not expired:
+            return
+
+        for x, y, damage in expired:
+            cell = (x, y)
+            remaining = self.damage_zones[cell] - damage
+            if remaining > 0:
+                self.damage_zones[cell] = remaining
+            else:
+                del self.damage_zones[cell]
+        self.zones_version += 1
+
+    # Получение урона в клетке от зон
+    def get_damage_at(self, x: int, y: int) -> int:
+        return self.damage_zones.get((x, y), 0)
+
+    # Позиция спавна игрока (первая комната)
+    def get_spawn_position(self) -> Tuple[int, int]:
+        if self.rooms:
+            room = self.rooms[0]
+            return room[0]+room[2]//2, room[1]+room[3]//2
+        return 5, 5
+
+    # Позиции для спавна врагов
+    # param rng: Поток случайных чисел спавна
+    def get_enemy_spawn_positions(self, count: int, rng: random.Random) -> List[Tuple[int, int]]:
+        positions = []
+
+        if len(self.rooms) <= 1:
+            return positions
+
+        for _ in range(count * 5):
+            if len(positions) >= count:
+                break
+
+            room = rng.choice(self.rooms[1:])
+
+            for _ in range(10):
+                x = rng.randint(room[0]+1, room[0]+room[2]-2)
+                y = rng.randint(room[1]+1, room[1]+room[3]-2)
+
+                if self.exit_pos and (x, y) == self.exit_pos:
+                    continue
+
+                if not self.is_blocked(x, y):
+                    # Проверка минимального расстояния между врагами
+                    too_close = False
+                    for px, py in positions:
+                        if abs(px-x) <= 1 and abs(py-y) <= 1:
+                            too_close = True
+                            break
+
+                    if not too_close:
+                        positions.append((x, y))
+                        break
+
+        return positions
@@ -0,0 +1,254 @@
+# grid.py
+from typing import Dict, List, Tuple, Union
+
+# Сторона чанка большой сетки (степень двойки) и маска смещения внутри чанка
+CHUNK_SHIFT = 5
+CHUNK_SIZE = 1 << CHUNK_SHIFT
+CHUNK_MASK = CHUNK_SIZE - 1
+
+# Число клеток, начиная с которого сетка хранится чанками
+CHUNKED_MIN_CELLS = 128 * 128
+
+
+# Класс компактной двумерной сетки на основе bytearray
+# Сетка хранится по столбцам, доступ grid[x][y] идет через срезы memoryview без копирования
+class Grid(list):
+    # param width: Ширина сетки
+    # param height: Высота сетки
+    # param value: Начальное значение клеток
+    # param fmt: Формат элемента memoryview ("B" - код тайла, "?" - флаг)
+    def __init__(self, width: int, height: int, value: Union[int, bool] = 0, fmt: str = "B"):
+        self.width = width
+        self.height = height
+        self.data = bytearray([int(value)]) * (width * height)
+        view = memoryview(self.data)
+        if fmt != "B":
+            view = view.cast(fmt)
+        super().__init__(view[x * height:(x + 1) * height] for x in range(width))
+
+    # Функция заполнения всей сетки одним значением
+    def fill(self, value: Union[int, bool]):
+        self.data[:] = bytes([int(value)]) * len(self.data)
+
+    # Функция загрузки всей сетки из плоского буфера (порядок как у data)
+    def load(self, flat: bytes):
+        self.data[:] = flat
+
+    # Функция подсчета клеток с заданным значением
+    def count_value(self, value: Union[int, bool]) -> int:
+        return self.data.count(int(value))
+
+    # Функция получения маски по таблице перекодировки (256 байт)
+    # return: Плоский буфер в том же порядке, что и data
+    def translate(self, table: bytes) -> bytearray:
+        return self.data.translate(table)
+
+    # Функция получения прямоугольного окна сетки в плоском буфере (по столбцам)
+    # param x0, y0: Левый нижний угол окна (включительно)
+    # param x1, y1: Правый верхний угол окна (не включительно)
+    def window(self, x0: int, y0: int, x1: int, y1: int) -> bytearray:
+        height = self.height
+        if y0 == 0 and y1 == height:
+            return self.data[x0 * height:x1 * height]
+        out = bytearray()
+        for x in range(x0, x1):
+            out += self.data[x * height + y0:x * height + y1]
+        return out
+
+    # Функция получения клеток с ненулевым значением
+    def nonzero_cells(self) -> List[Tuple[int, int]]:
+        height = self.height
+        return [divmod(index, height) for index, value in enumerate(self.data) if value]
+
+    # Функция проверки, что чанк не хранит данных (у плоской сетки хранится все)
+    def chunk_is_empty(self, chunk_x: int, chunk_y: int) -> bool:
+        return False
+
+    # Функция получения индекса клетки в плоском буфере
+    def index_of(self, x: int, y: int) -> int:
+        return x * self.height + y
+
+
+# Класс столбца чанковой сетки: части столбца по чанкам, None - чанк не выделен
+class _ChunkColumn:
+    __slots__ = ("grid", "x", "parts")
+
+    def __init__(self, grid: "ChunkedGrid", x: int, chunks_y: int):
+        self.grid = grid
+        self.x = x
+        self.parts: List = [None] * chunks_y
+
+    def __len__(self) -> int:
+        return self.grid.height
+
+    def __getitem__(self, y: int):
+        part = self.parts[y >> CHUNK_SHIFT]
+        if part is None:
+            return self.grid.default
+        return part[y & CHUNK_MASK]
+
+    def __setitem__(self, y, value):
+        if isinstance(y, slice):
+            self.grid.write_column(self.x, y.start or 0, value)
+            return
+        index = y >> CHUNK_SHIFT
+        part = self.parts[index]
+        if part is None:
+            if value == self.grid.default:
+                return
+            self.grid.allocate(self.x >> CHUNK_SHIFT, index)
+            part = self.parts[index]
+        part[y & CHUNK_MASK] = value
+
+
+# Класс большой сетки из чанков CHUNK_SIZE x CHUNK_SIZE, выделяемых при первой записи
+# Невыделенные чанки читаются как значение по умолчанию, поэтому память растет
+# только с исследованной и застроенной частью мира. Доступ grid[x][y] тот же, что у Grid
+class ChunkedGrid(list):
+    # param width: Ширина сетки
+    # param height: Высота сетки
+    # param value: Значение невыделенных клеток
+    # param fmt: Формат элемента memoryview ("B" - код тайла, "?" - флаг)
+    def __init__(self, width: int, height: int, value: Union[int, bool] = 0, fmt: str = "B"):
+        self.width = width
+        self.height = height
+        self.fmt = fmt
+        self.default = bool(value) if fmt == "?" else int(value)
+        self.chunks_x = (width + CHUNK_MASK) >> CHUNK_SHIFT
+        self.chunks_y = (height + CHUNK_MASK) >> CHUNK_SHIFT
+        # (чанк x, чанк y) -> буфер чанка, внутри чанка клетки тоже идут по столбцам
+        self.chunks: Dict[Tuple[int, int], bytearray] = {}
+        super().__init__(_ChunkColumn(self, x, self.chunks_y) for x in range(width))
+
+    # Функция выделения чанка, заполненного значением по умолчанию
+    def allocate(self, chunk_x: int, chunk_y: int) -> bytearray:
+        buffer = self.chunks.get((chunk_x, chunk_y))
+        if buffer is not None:
+            return buffer
+        buffer = bytearray([int(self.default)]) * (CHUNK_SIZE * CHUNK_SIZE)
+        self.chunks[(chunk_x, chunk_y)] = buffer
+        view = memoryview(buffer)
+        if self.fmt != "B":
+            view = view.cast(self.fmt)
+        left = chunk_x << CHUNK_SHIFT
+        for local_x in range(min(CHUNK_SIZE, self.width - left)):
+            self[left + local_x].parts[chunk_y] = view[local_x * CHUNK_SIZE:(local_x + 1) * CHUNK_SIZE]
+        return buffer
+
+    # Функция записи байтов в столбец начиная с клетки y (чанки выделяются по необходимости)
+    def write_column(self, x: int, y: int, values: bytes):
+        local_x = (x & CHUNK_MASK) * CHUNK_SIZE
+        fill = int(self.default)
+        start = y
+        end = y + len(values)
+        while y < end:
+            chunk_y = y >> CHUNK_SHIFT
+            stop = min(end, (chunk_y + 1) << CHUNK_SHIFT)
+            segment = values[y - start:stop - start]
+            buffer = self.chunks.get((x >> CHUNK_SHIFT, chunk_y))
+            if buffer is None and segment.count(fill) != len(segment):
+                buffer = self.allocate(x >> CHUNK_SHIFT, chunk_y)
+            if buffer is not None:
+                offset = local_x + (y & CHUNK_MASK)
+                buffer[offset:offset + stop - y] = segment
+            y = stop
+
+    # Функция заполнения всей сетки одним значением (все чанки освобождаются)
+    def fill(self, value: Union[int, bool]):
+        self.default = bool(value) if self.fmt == "?" else int(value)
+        if self.chunks:
+            self.chunks.clear()
+            for column in self:
+                column.parts = [None] * self.chunks_y
+
+    # Функция загрузки всей сетки из плоского буфера (порядок как у Grid.data)
+    def load(self, flat: bytes):
+        self.fill(self.default)
+        height = self.height
+        for x in range(self.width):
+            self.write_column(x, 0, flat[x * height:(x + 1) * height])
+
+    # Функция загрузки буфера чанка целиком (порядок клеток как в chunks)
+    def load_chunk(self, chunk_x: int, chunk_y: int, data: bytes):
+        self.allocate(chunk_x, chunk_y)[:] = data
+
+    # Плоская копия всей сетки в порядке Grid.data
+    @property
+    def data(self) -> bytearray:
+        return self.window(0, 0, self.width, self.height)
+
+    # Функция получения числа реальных клеток чанка (крайние чанки обрезаны краем сетки)
+    def _chunk_cells(self, chunk_x: int, chunk_y: int) -> int:
+        return (min(CHUNK_SIZE, self.width - (chunk_x << CHUNK_SHIFT))
+                * min(CHUNK_SIZE, self.height - (chunk_y << CHUNK_SHIFT)))
+
+    # Функция подсчета клеток с заданным значением
+    def count_value(self, value: Union[int, bool]) -> int:
+        value = int(value)
+        is_default = value == int(self.default)
+        total = 0
+        stored = 0
+        for (chunk_x, chunk_y), buffer in self.chunks.items():
+            cells = self._chunk_cells(chunk_x, chunk_y)
+            stored += cells
+            # Клетки за краем сетки хранят значение по умолчанию и не считаются
+            total += buffer.count(value) - (len(buffer) - cells if is_default else 0)
+        if is_default:
+            total += self.width * self.height - stored
+        return total
+
+    # Функция получения маски по таблице перекодировки (256 байт)
+    # return: Плоский буфер в порядке Grid.data
+    def translate(self, table: bytes) -> bytearray:
+        return self.data.translate(table)
+
+    # Функция получения прямоугольного окна сетки в плоском буфере (по столбцам)
+    # param x0, y0: Левый нижний угол окна (включительно)
+    # param x1, y1: Правый верхний угол окна (не включительно)
+    def window(self, x0: int, y0: int, x1: int, y1: int) -> bytearray:
+        out = bytearray()
+        fill = bytes([int(self.default)])
+        chunks = self.chunks
+        for x in range(x0, x1):
+            chunk_x = x >> CHUNK_SHIFT
+            local_x = (x & CHUNK_MASK) * CHUNK_SIZE
+            y = y0
+            while y < y1:
+                chunk_y = y >> CHUNK_SHIFT
+                stop = min(y1, (chunk_y + 1) << CHUNK_SHIFT)
+                buffer = chunks.get((chunk_x, chunk_y))
+                if buffer is None:
+                    out += fill * (stop - y)
+                else:
+                    offset = local_x + (y & CHUNK_MASK)
+                    out += buffer[offset:offset + stop - y]
+                y = stop
+        return out
+
+    # Функция получения клеток с ненулевым значением (обходятся только выделенные чанки)
+    def nonzero_cells(self) -> List[Tuple[int, int]]:
+        if self.default:
+            return [(x, y) for x in range(self.width) for y in range(self.height) if self[x][y]]
+        cells = []
+        for (chunk_x, chunk_y), buffer in self.chunks.items():
+            left = chunk_x << CHUNK_SHIFT
+            bottom = chunk_y << CHUNK_SHIFT
+            for index, value in enumerate(buffer):
+                if value:
+                    cells.append((left + (index >> CHUNK_SHIFT), bottom + (index & CHUNK_MASK)))
+        return cells
+
+    # Функция проверки, что чанк не хранит данных (все клетки - значение по умолчанию)
+    def chunk_is_empty(self, chunk_x: int, chunk_y: int) -> bool:
+        return (chunk_x, chunk_y) not in self.chunks
+
+
+# Функция создания сетки: небольшие карты хранятся плоско, большие - чанками
+# param width: Ширина сетки
+# param height: Высота сетки
+# param value: Начальное значение клеток
+# param fmt: Формат элемента memoryview
+def make_grid(width: int, height: int, value: Union[int, bool] = 0, fmt: str = "B") -> Union[Grid, ChunkedGrid]:
+    if width * height >= CHUNKED_MIN_CELLS:
+        return ChunkedGrid(width, height, value, fmt)
+    return Grid(width, height, value, fmt)
@@ -0,0 +1,80 @@
+# headless.py
+import random
+import sys
+import time
+from typing import Callable, Optional, Tuple
+
+from constants import Action, GameState, MUTATION_ACTIONS
+from game import Game
+
+# Действия, доступные простой случайной политике
+MOVE_ACTIONS = (Action.MOVE_UP, Action.MOVE_DOWN, Action.MOVE_LEFT, Action.MOVE_RIGHT)
+
+
+# Класс безголового запуска игры: ходы обрабатываются без окна и отрисовки
+class HeadlessGame:
+    # param map_size: Размер карт всех уровней (None - обычные размеры)
+    def __init__(self, map_size: Optional[Tuple[int, int]] = None):
+        self.game = Game()
+        self.game.map_size = map_size
+
+    # Функция начала новой игры
+    # param seed: Сид забега (None - случайный)
+    def new_game(self, seed: Optional[int] = None):
+        self.game.init_new_game(seed)
+
+    # Функция выполнения действия игрока и ответного хода врагов
+    # param action: Действие игрока
+    # return: Результат обработки действия ("menu" или пустая строка)
+    def act(self, action: Action) -> str:
+        result = self.game.perform_action(action)
+        # В оконном режиме ход врагов выполняется в on_update, здесь - сразу
+        if self.game.state == GameState.ENEMY_TURN:
+            self.game.process_enemy_turn()
+        return result
+
+    # Функция прогона игры по политике до конца или до лимита ходов
+    # param policy: Функция выбора действия по состоянию игры
+    # param max_turns: Предельное число ходов игрока
+    # return: Число выполненных ходов врагов
+    def run(self, policy: Callable[[Game], Action], max_turns: int) -> int:
+        start_turn = self.game.turn_count
+        for _ in range(max_turns):
+            if self.game.state in (GameState.GAME_OVER, GameState.VICTORY):
+                break
+            self.act(policy(self.game))
+        return self.game.turn_count - start_turn
+
+
+# Функция случайной политики: бродит, выбирает первую мутацию и пытается выйти
+def random_policy(game: Game, rng: Optional[random.Random] = None) -> Action:
+    rng = rng or random
+    if game.state == GameState.LEVEL_UP:
+        return MUTATION_ACTIONS[0]
+    if game.state == GameState.PAUSED:
+        return Action.CANCEL
+    if (game.player.x, game.player.y) == game.game_map.exit_pos and game.get_enemies_count() == 0:
+        return Action.USE_EXIT
+    return rng.choice(MOVE_ACTIONS)
+
+
+# Функция замера скорости безголового прогона
+# Использование: python headless.py [ходы] [ширинаxвысота]
+def main():
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    map_size = tuple(int(side) for side in sys.argv[2].split("x")) if len(sys.argv) > 2 else None
+    runner = HeadlessGame(map_size)
+    runner.new_game()
+
+    start = time.perf_counter()
+    done = 0
+    while done < turns:
+        done += runner.run(random_policy, turns - done)
+        if runner.game.state in (GameState.GAME_OVER, GameState.VICTORY):
+            runner.new_game()
+    elapsed = time.perf_counter() - start
+    print(f"{done} ходов за {elapsed:.2f} с ({done / elapsed:.0f} ходов/с)")
+
+
+if __name__ == "__main__":
+    main()
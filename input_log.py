@@ -0,0 +1,76 @@
+# input_log.py
+import struct
+from typing import Optional
+
+from constants import Action
+
+# Сигнатура и версия формата журнала ввода
+INPUT_LOG_MAGIC = b"LTRP"
+INPUT_LOG_VERSION = 1
+
+# Заголовок: сигнатура, версия, сид, длина начального снимка, число действий
+INPUT_LOG_HEADER = struct.Struct("<4sHQII")
+
+# Действия по их коду в журнале
+ACTIONS_BY_CODE = {action.value: action for action in Action}
+
+
+# Класс журнала ввода забега: сид, начальный снимок и действия игрока по порядку
+# Одинаковый сид (или снимок) и те же действия воспроизводят забег ход в ход
+class InputLog:
+    # param seed: Сид забега
+    # param start: Снимок состояния, с которого начат журнал (None - начало забега)
+    def __init__(self, seed: int, start: Optional[bytes] = None):
+        self.seed = seed
+        self.start = start
+        # Коды действий, по одному байту на действие
+        self.actions = bytearray()
+
+    def __len__(self) -> int:
+        return len(self.actions)
+
+    # Функция записи действия игрока
+    def record(self, action: Action):
+        self.actions.append(action.value)
+
+    # Функция получения действия по номеру
+    def action_at(self, index: int) -> Action:
+        return ACTIONS_BY_CODE[self.actions[index]]
+
+    # Функция кодирования журнала в байты
+    def to_bytes(self) -> bytes:
+        start = self.start or b""
+        return (INPUT_LOG_HEADER.pack(INPUT_LOG_MAGIC, INPUT_LOG_VERSION, self.seed, len(start), len(self.actions))
+                + start + bytes(self.actions))
+
+    # Функция восстановления журнала из байтов
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "InputLog":
+        try:
+            magic, version, seed, start_size, count = INPUT_LOG_HEADER.unpack_from(data)
+        except struct.error as error:
+            raise ValueError("Файл журнала поврежден") from error
+        if magic != INPUT_LOG_MAGIC:
+            raise ValueError("Файл не является журналом ввода")
+        if version != INPUT_LOG_VERSION:
+            raise ValueError(f"Неподдерживаемая версия журнала: {version}")
+
+        offset = INPUT_LOG_HEADER.size
+        if len(data) != offset + start_size + count:
+            raise ValueError("Файл журнала поврежден")
+        log = cls(seed, data[offset:offset + start_size] or None)
+        log.actions = bytearray(data[offset + start_size:])
+        if any(code not in ACTIONS_BY_CODE for code in log.actions):
+            raise ValueError("Файл журнала поврежден")
+        return log
+
+    # Функция сохранения журнала в файл
+    def save(self, path: str):
+        with open(path, "wb") as file:
+            file.write(self.to_bytes())
+
+    # Функция загрузки журнала из файла
+    @classmethod
+    def load(cls, path: str) -> "InputLog":
+        with open(path, "rb") as file:
+            return cls.from_bytes(file.read())
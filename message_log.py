@@ -0,0 +1,28 @@
+# message_log.py
+from constants import WHITE
+
+from collections import deque
+from typing import List, Tuple, Deque
+
+
+# Класс отвечающий за хранение и управление журналом сообщений игры
+class MessageLog:
+    def __init__(self, max_messages: int = 50):
+        # Хранилище сообщений в виде очереди с ограниченной длиной
+        self.messages: Deque[Tuple[str, Tuple[int, int, int]]] = deque(maxlen=max_messages)
+
+    # Функция добавления нового сообщения в журнал
+    # param text: Текст сообщения
+    # param color: Цвет текста сообщения
+    def add(self, text: str, color: Tuple[int, int, int] = WHITE):
+        self.messages.append((text, color))
+
+    # Функция получения последних сообщений из журнала
+    # param count: Количество возвращаемых сообщений
+    # return: Список последних сообщений
+    def get_recent(self, count: int = 6) -> List[Tuple[str, Tuple[int, int, int]]]:
+        return list(self.messages)[-count:]
+
+    # Функция очистки журнала сообщений
+    def clear(self):
+        self.messages.clear()
@@ -0,0 +1,216 @@
+# pathfinding.py
+import heapq
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Значение для клеток, до которых поиск не дошел
+UNREACHED = -1
+
+
+# Класс карты расстояний (поля потока) от нескольких источников
+# Строится одним обходом в ширину, после чего любой враг получает следующий шаг за O(1)
+class DistanceMap:
+    # param game_map: Карта уровня
+    # param sources: Клетки-источники (цели преследования)
+    # param max_distance: Предельная длина пути, дальше которой обход не продолжается
+    def __init__(self, game_map, sources: List[Tuple[int, int]], max_distance: int):
+        self.max_distance = max_distance
+        inside = [(x, y) for x, y in sources if 0 <= x < game_map.width and 0 <= y < game_map.height]
+        # Обход не уходит от источников дальше max_distance, поэтому поле строится
+        # только в окне вокруг них, а не по всей карте
+        if inside:
+            self.left = max(0, min(x for x, _ in inside) - max_distance)
+            self.bottom = max(0, min(y for _, y in inside) - max_distance)
+            right = min(game_map.width, max(x for x, _ in inside) + max_distance + 1)
+            top = min(game_map.height, max(y for _, y in inside) + max_distance + 1)
+        else:
+            self.left = self.bottom = right = top = 0
+        self.width = right - self.left
+        self.height = top - self.bottom
+        size = self.width * self.height
+        # Расстояние до ближайшего источника и индекс этого источника (по клеткам окна)
+        self.distances = [UNREACHED] * size
+        self.owners = [UNREACHED] * size
+        self._build(game_map.walkable_window(self.left, self.bottom, right, top), sources)
+
+    # Функция обхода в ширину от всех источников одновременно
+    def _build(self, walkable: bytearray, sources: List[Tuple[int, int]]):
+        height = self.height
+        size = len(self.distances)
+        distances = self.distances
+        owners = self.owners
+        queue = deque()
+
+        for owner, (x, y) in enumerate(sources):
+            x -= self.left
+            y -= self.bottom
+            if not (0 <= x < self.width and 0 <= y < height):
+                continue
+            index = x * height + y
+            if distances[index] == UNREACHED:
+                distances[index] = 0
+                owners[index] = owner
+                queue.append(index)
+
+        while queue:
+            index = queue.popleft()
+            distance = distances[index] + 1
+            if distance > self.max_distance:
+                continue
+            owner = owners[index]
+            y = index % height
+            for neighbor in (index + height if index + height < size else -1,
+                             index - height,
+                             index + 1 if y + 1 < height else -1,
+                             index - 1 if y > 0 else -1):
+                if neighbor >= 0 and walkable[neighbor] and distances[neighbor] == UNREACHED:
+                    distances[neighbor] = distance
+                    owners[neighbor] = owner
+                    queue.append(neighbor)
+
+    # Функция получения расстояния до ближайшего источника
+    # return: Длина пути или UNREACHED
+    def distance_at(self, x: int, y: int) -> int:
+        x -= self.left
+        y -= self.bottom
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.distances[x * self.height + y]
+        return UNREACHED
+
+    # Функция получения индекса ближайшего по пути источника
+    # return: Индекс в списке источников или UNREACHED
+    def owner_at(self, x: int, y: int) -> int:
+        x -= self.left
+        y -= self.bottom
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.owners[x * self.height + y]
+        return UNREACHED
+
+    # Функция выбора следующего шага вниз по полю расстояний
+    # param is_blocked: Проверка занятости клетки
+    # return: Координаты шага или None, если улучшить расстояние нельзя
+    def next_step(self, x: int, y: int,
+                  is_blocked: Callable[[int, int], bool]) -> Optional[Tuple[int, int]]:
+        current = self.distance_at(x, y)
+        if current == UNREACHED:
+            return None
+
+        best = None
+        best_distance = current
+        for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+            nx, ny = x + dx, y + dy
+            distance = self.distance_at(nx, ny)
+            if distance != UNREACHED and distance < best_distance and not is_blocked(nx, ny):
+                best = (nx, ny)
+                best_distance = distance
+        return best
+
+
+# Класс поиска пути A* с кэшем найденных путей на один ход
+# Пути ищутся по стенам карты; занятость клеток проверяется при следовании по пути.
+# Между ходами сущности перемещаются, поэтому кэш очищается в начале каждого хода (clear)
+class PathFinder:
+    # param game_map: Карта уровня
+    # param max_nodes: Предельное число раскрытых клеток за один поиск
+    def __init__(self, game_map, max_nodes: int = 4000):
+        self.game_map = game_map
+        self.max_nodes = max_nodes
+        # (клетка, цель) -> (путь, индекс клетки в пути) для текущего хода и версии карты
+        self._cache: Dict[Tuple[Tuple[int, int], Tuple[int, int]], Tuple[List[Tuple[int, int]], int]] = {}
+        self._version = None
+        self._walkable = b""
+
+    # Функция сброса кэша при изменении тайлов карты
+    def _sync_version(self):
+        if self._version != self.game_map.tiles_version:
+            self._version = self.game_map.tiles_version
+            self._walkable = self.game_map.walkable_mask()
+            self._cache.clear()
+
+    # Функция очистки кэша путей (начало хода)
+    def clear(self):
+        self._cache.clear()
+
+    # Функция получения пути от start до goal (включительно)
+    # return: Список клеток пути или None, если путь не найден
+    def find_path(self, start: Tuple[int, int], goal: Tuple[int, int]) -> Optional[List[Tuple[int, int]]]:
+        self._sync_version()
+        entry = self._cache.get((start, goal))
+        if entry is not None:
+            path, index = entry
+            return path[index:]
+
+        path = self._search(start, goal, None)
+        if path:
+            self._remember(path)
+        return path
+
+    # Функция получения следующего шага по кэшированному пути
+    # param is_blocked: Проверка занятости клетки
+    # return: Координаты шага или None, если шагнуть некуда
+    def next_step(self, start: Tuple[int, int], goal: Tuple[int, int],
+                  is_blocked: Callable[[int, int], bool]) -> Optional[Tuple[int, int]]:
+        path = self.find_path(start, goal)
+        if not path or len(path) < 2:
+            return None
+
+        step = path[1]
+        if step != goal and is_blocked(step[0], step[1]):
+            # Путь перекрыт сущностью - ищем обход занятых клеток; обход верен только
+            # при текущей занятости, поэтому в кэш не попадает
+            path = self._search(start, goal, is_blocked)
+            if not path or len(path) < 2:
+                return None
+            step = path[1]
+        return step
+
+    # Функция сохранения пути и всех его суффиксов в кэше
+    def _remember(self, path: List[Tuple[int, int]]):
+        goal = path[-1]
+        for index, cell in enumerate(path):
+            self._cache[(cell, goal)] = (path, index)
+
+    # Функция поиска A* по четырем направлениям с манхэттенской эвристикой
+    # param is_blocked: Если задана, занятые клетки (кроме цели) непроходимы
+    def _search(self, start: Tuple[int, int], goal: Tuple[int, int],
+                is_blocked: Optional[Callable[[int, int], bool]]) -> Optional[List[Tuple[int, int]]]:
+        width, height = self.game_map.width, self.game_map.height
+        gx, gy = goal
+        if not (0 <= gx < width and 0 <= gy < height):
+            return None
+
+        walkable = self._walkable
+        came_from = {start: None}
+        cost = {start: 0}
+        open_heap = [(abs(start[0] - gx) + abs(start[1] - gy), 0, start)]
+        expanded = 0
+
+        while open_heap:
+            _, g, cell = heapq.heappop(open_heap)
+            if cell == goal:
+                path = []
+                while cell is not None:
+                    path.append(cell)
+                    cell = came_from[cell]
+                path.reverse()
+                return path
+            if g > cost[cell]:
+                continue
+
+            expanded += 1
+            if expanded > self.max_nodes:
+                return None
+
+            x, y = cell
+            for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                if not (0 <= nx < width and 0 <= ny < height) or not walkable[nx * height + ny]:
+                    continue
+                neighbor = (nx, ny)
+                if is_blocked is not None and neighbor != goal and is_blocked(nx, ny):
+                    continue
+                new_cost = g + 1
+                if new_cost < cost.get(neighbor, new_cost + 1):
+                    cost[neighbor] = new_cost
+                    came_from[neighbor] = cell
+                    heapq.heappush(open_heap, (new_cost + abs(nx - gx) + abs(ny - gy), new_cost, neighbor))
+        return None
@@ -0,0 +1,119 @@
+# perf.py
+import functools
+from collections import deque
+from time import perf_counter
+from typing import Callable, Deque, Dict
+
+
+# Класс замера времени одного участка (переиспользуется, чтобы не создавать объекты каждый кадр)
+class _Timer:
+    __slots__ = ("perf", "name", "start")
+
+    def __init__(self, perf: "PerfStats", name: str):
+        self.perf = perf
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.perf.add(self.name, perf_counter() - self.start)
+        return False
+
+
+# Класс пустого замера для выключенной статистики
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+# Класс статистики производительности: скользящие окна времени по подсистемам и счетчик отрисовок
+# Пока статистика выключена, замеры не выполняются и вызовы отрисовки не считаются.
+# Вызовы отрисовки считает сам интерфейс в местах отрисовки (UI, TextCache) через count_draws
+class PerfStats:
+    # param window_size: Количество последних замеров в скользящем окне
+    def __init__(self, window_size: int = 120):
+        self.enabled = False
+        self.window_size = window_size
+        # Имя участка -> последние замеры в секундах
+        self.samples: Dict[str, Deque[float]] = {}
+        self._timers: Dict[str, _Timer] = {}
+        # Вызовы отрисовки текущего и прошлого кадра
+        self.draw_calls = 0
+        self.last_draw_calls = 0
+
+    # Функция включения и выключения статистики
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.samples.clear()
+        self.draw_calls = self.last_draw_calls = 0
+
+    # Функция получения замера участка для использования в with
+    # param name: Имя участка
+    def timer(self, name: str):
+        if not self.enabled:
+            return _NULL_TIMER
+        timer = self._timers.get(name)
+        if timer is None:
+            timer = self._timers[name] = _Timer(self, name)
+        return timer
+
+    # Функция добавления замера
+    # param name: Имя участка
+    # param seconds: Длительность в секундах
+    def add(self, name: str, seconds: float):
+        window = self.samples.get(name)
+        if window is None:
+            window = self.samples[name] = deque(maxlen=self.window_size)
+        window.append(seconds)
+
+    # Функция получения среднего времени участка
+    # return: Среднее в миллисекундах (0, если замеров нет)
+    def average_ms(self, name: str) -> float:
+        window = self.samples.get(name)
+        return sum(window) / len(window) * 1000 if window else 0.0
+
+    # Функция получения наибольшего времени участка в окне
+    # return: Максимум в миллисекундах (0, если замеров нет)
+    def max_ms(self, name: str) -> float:
+        window = self.samples.get(name)
+        return max(window) * 1000 if window else 0.0
+
+    # Функция начала кадра: счетчик отрисовок прошлого кадра сохраняется для показа
+    def begin_frame(self):
+        self.last_draw_calls = self.draw_calls
+        self.draw_calls = 0
+
+    # Функция учета вызовов отрисовки
+    # param count: Количество вызовов
+    def count_draws(self, count: int = 1):
+        if self.enabled:
+            self.draw_calls += count
+
+
+# Декоратор замера метода объекта с атрибутом perf
+# param name: Имя участка
+def timed(name: str) -> Callable:
+    def decorator(method: Callable) -> Callable:
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            perf = self.perf
+            if not perf.enabled:
+                return method(self, *args, **kwargs)
+            start = perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                perf.add(name, perf_counter() - start)
+        return wrapper
+    return decorator
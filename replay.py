@@ -0,0 +1,114 @@
+# replay.py
+import sys
+import time
+from bisect import bisect_right
+from typing import List, Optional, Tuple
+
+from constants import GameState
+from game import Game
+from input_log import InputLog
+
+
+# Класс воспроизведения журнала ввода через движок ходов без отрисовки
+# По ходу воспроизведения сохраняются снимки состояния, по которым работает переход к ходу
+class Replay:
+    # param log: Журнал ввода
+    # param checkpoint_interval: Через сколько ходов врагов сохранять снимок
+    # param game: Игра для воспроизведения (по умолчанию безголовая)
+    def __init__(self, log: InputLog, checkpoint_interval: int = 100, game: Optional[Game] = None):
+        self.log = log
+        self.checkpoint_interval = checkpoint_interval
+        self.game = game or Game()
+        # Воспроизведение не пишет сохранения и журнал поверх исходных
+        self.game.save_path = None
+        self.game.input_log_path = None
+        self.position = 0
+        # Снимки (номер хода, позиция в журнале, состояние), упорядочены по ходу
+        self.checkpoints: List[Tuple[int, int, bytes]] = []
+        self.reset()
+
+    # Функция возврата к началу журнала
+    def reset(self):
+        if self.log.start is not None:
+            self.game.restore(self.log.start)
+        else:
+            self.game.init_new_game(self.log.seed)
+        self.game.input_log = None
+        self.position = 0
+        if not self.checkpoints:
+            self.checkpoints.append((self.game.turn_count, 0, self.game.snapshot()))
+
+    # Функция проверки окончания журнала
+    # Игра, дошедшая до конца, дальше не воспроизводится
+    def finished(self) -> bool:
+        return self.position >= len(self.log) or self.game.state in (GameState.GAME_OVER, GameState.VICTORY)
+
+    # Функция выполнения одного действия из журнала с ответным ходом врагов
+    # return: False, если журнал закончился
+    def step(self) -> bool:
+        if self.finished():
+            return False
+
+        game = self.game
+        action = self.log.action_at(self.position)
+        self.position += 1
+        turn = game.turn_count
+        game.perform_action(action)
+        if game.state == GameState.ENEMY_TURN:
+            game.process_enemy_turn()
+
+        # Снимок на каждой новой границе интервала
+        if (game.turn_count != turn and game.turn_count % self.checkpoint_interval == 0
+                and game.turn_count > self.checkpoints[-1][0]):
+            self.checkpoints.append((game.turn_count, self.position, game.snapshot()))
+        return True
+
+    # Функция быстрой перемотки: действия выполняются подряд без отрисовки
+    # param max_actions: Предельное число действий (None - до конца журнала)
+    # return: Число выполненных действий
+    def fast_forward(self, max_actions: Optional[int] = None) -> int:
+        done = 0
+        while (max_actions is None or done < max_actions) and self.step():
+            done += 1
+        return done
+
+    # Функция перехода к ходу: восстановление ближайшего снимка и перемотка от него
+    # param turn: Номер хода врагов
+    # return: Номер хода, на котором остановилось воспроизведение
+    def seek(self, turn: int) -> int:
+        game = self.game
+        index = bisect_right([checkpoint[0] for checkpoint in self.checkpoints], turn) - 1
+        checkpoint_turn, position, data = self.checkpoints[max(0, index)]
+        # Назад или через известный снимок - с ближайшего снимка, иначе от текущего хода
+        if turn < game.turn_count or checkpoint_turn > game.turn_count:
+            game.restore(data)
+            self.position = position
+
+        while game.turn_count < turn and self.step():
+            pass
+        return game.turn_count
+
+
+# Функция воспроизведения журнала из командной строки
+# Использование: python replay.py [журнал] [ход]
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else "last_run.replay"
+    log = InputLog.load(path)
+    replay = Replay(log)
+
+    start = time.perf_counter()
+    if len(sys.argv) > 2:
+        replay.seek(int(sys.argv[2]))
+    else:
+        replay.fast_forward()
+    elapsed = time.perf_counter() - start
+
+    game = replay.game
+    turns = game.turn_count
+    print(f"{replay.position} действий, {turns} ходов за {elapsed:.2f} с ({turns / max(elapsed, 1e-9):.0f} ходов/с)")
+    print(f"Уровень {game.current_level}, HP {game.player.stats.hp}/{game.player.stats.max_hp}, "
+          f"состояние {game.state.name}")
+
+
+if __name__ == "__main__":
+    main()
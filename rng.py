@@ -0,0 +1,26 @@
+# rng.py
+import random
+
+
+# Класс независимых потоков случайных чисел для подсистем игры
+# Все потоки выводятся из одного сида забега: одинаковый сид и ввод дают одинаковую игру
+class RandomStreams:
+    # param seed: Сид забега
+    def __init__(self, seed: int):
+        self.seed = seed
+        # Потоки, общие для всего забега
+        self.combat = random.Random(f"{seed}:combat")
+        self.ai = random.Random(f"{seed}:ai")
+        self.loot = random.Random(f"{seed}:loot")
+
+    # Функция получения потока подсистемы для конкретного уровня
+    # Генерация карты и спавн не зависят от порядка событий на предыдущих уровнях
+    # param name: Имя подсистемы ("mapgen", "spawn")
+    # param level: Номер уровня
+    def for_level(self, name: str, level: int) -> random.Random:
+        return random.Random(f"{self.seed}:{name}:{level}")
+
+
+# Функция получения нового сида забега
+def new_seed() -> int:
+    return random.SystemRandom().randrange(2 ** 32)
@@ -0,0 +1,363 @@
+# save.py
+import os
+import random
+import struct
+from itertools import groupby
+from typing import List, Optional, Tuple
+
+from constants import EntityType, GameState
+from entities import Entity, EntityRegistry, Stats, Resources, MUTATIONS, FACTION_VIRUS
+from game_map import GameMap
+from grid import CHUNK_SIZE, ChunkedGrid
+from message_log import MessageLog
+from rng import RandomStreams
+
+# Сигнатура и версия формата сохранения
+SAVE_MAGIC = b"LTSV"
+SAVE_VERSION = 3
+
+# Форматы записей (little-endian, без выравнивания)
+HEADER = struct.Struct("<4sH")
+GAME_RECORD = struct.Struct("<QBBI")            # сид, уровень, состояние, номер хода
+RESOURCES_RECORD = struct.Struct("<6i")
+RNG_RECORD = struct.Struct("<B625IBd")          # версия, состояние Mersenne Twister, gauss_next
+MAP_RECORD = struct.Struct("<HHhhI")            # ширина, высота, выход, ход зон урона
+ROOM_RECORD = struct.Struct("<4H")
+ZONE_RECORD = struct.Struct("<IHHi")            # ход истечения, x, y, урон
+RUN_RECORD = struct.Struct("<BH")               # значение тайла, длина серии
+CHUNKED_RECORD = struct.Struct("<BI")           # значение по умолчанию, число выделенных чанков
+CHUNK_RECORD = struct.Struct("<HH")             # чанк x, чанк y
+ENTITY_RECORD = struct.Struct("<BBhh6i3B")      # тип, флаги, x, y, характеристики, цвет
+SCHEDULER_RECORD = struct.Struct("<QI")         # время планировщика, следующий порядковый номер
+SCHEDULE_RECORD = struct.Struct("<QIH")         # время действия, порядковый номер, индекс сущности
+COUNT = struct.Struct("<I")
+SHORT_COUNT = struct.Struct("<H")
+COLOR = struct.Struct("<3B")
+
+# Флаги записи сущности
+FLAG_ALIVE = 1
+FLAG_PLAYER = 2
+FLAG_CLONE = 4
+
+# Имена потоков случайных чисел, общих для забега
+RNG_STREAMS = ("combat", "ai", "loot")
+
+
+# Функция кодирования сетки байтов сериями (значение, длина)
+# param data: Плоский буфер сетки
+# return: Закодированные серии
+def encode_runs(data: bytes) -> bytes:
+    out = bytearray()
+    runs = 0
+    for value, group in groupby(data):
+        length = sum(1 for _ in group)
+        while length > 0:
+            chunk = min(length, 0xFFFF)
+            out += RUN_RECORD.pack(value, chunk)
+            length -= chunk
+            runs += 1
+    return COUNT.pack(runs) + bytes(out)
+
+
+# Функция упаковки логической сетки по 8 клеток в байт
+# param data: Плоский буфер из значений 0/1
+# return: Упакованные биты
+def pack_bits(data: bytes) -> bytes:
+    out = bytearray((len(data) + 7) // 8)
+    for index, value in enumerate(data):
+        if value:
+            out[index >> 3] |= 1 << (index & 7)
+    return bytes(out)
+
+
+# Функция распаковки логической сетки
+# param packed: Упакованные биты
+# param count: Количество клеток
+def unpack_bits(packed: bytes, count: int) -> bytes:
+    return bytes((packed[index >> 3] >> (index & 7)) & 1 for index in range(count))
+
+
+# Функция кодирования сетки: плоская пишется целиком, чанковая - только выделенными чанками
+# param bits: Логическая сетка (биты) или сетка тайлов (серии)
+def encode_grid(grid, bits: bool) -> bytes:
+    encode = pack_bits if bits else encode_runs
+    if not isinstance(grid, ChunkedGrid):
+        return encode(grid.data)
+    parts = [CHUNKED_RECORD.pack(int(grid.default), len(grid.chunks))]
+    for (chunk_x, chunk_y), buffer in sorted(grid.chunks.items()):
+        parts.append(CHUNK_RECORD.pack(chunk_x, chunk_y))
+        parts.append(encode(buffer))
+    return b"".join(parts)
+
+
+# Функция упаковки строки с длиной
+def pack_str(text: str) -> bytes:
+    data = text.encode("utf-8")
+    return SHORT_COUNT.pack(len(data)) + data
+
+
+# Класс последовательного чтения буфера сохранения
+class SaveReader:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.offset = 0
+
+    # Функция чтения записи заданного формата
+    def unpack(self, record: struct.Struct) -> tuple:
+        values = record.unpack_from(self.data, self.offset)
+        self.offset += record.size
+        return values
+
+    # Функция чтения сырых байтов
+    def read(self, size: int) -> bytes:
+        if self.offset + size > len(self.data):
+            raise ValueError("Файл сохранения поврежден")
+        chunk = self.data[self.offset:self.offset + size]
+        self.offset += size
+        return chunk
+
+    # Функция чтения количества элементов
+    def count(self) -> int:
+        return self.unpack(COUNT)[0]
+
+    # Функция чтения строки
+    def string(self) -> str:
+        return self.read(self.unpack(SHORT_COUNT)[0]).decode("utf-8")
+
+    # Функция чтения серий тайлов
+    def runs(self, size: int) -> bytes:
+        out = bytearray()
+        for _ in range(self.count()):
+            value, length = self.unpack(RUN_RECORD)
+            out += bytes((value,)) * length
+        if len(out) != size:
+            raise ValueError("Файл сохранения поврежден")
+        return bytes(out)
+
+
+# Функция чтения буфера заданного размера, закодированного encode_grid
+def read_cells(reader: SaveReader, size: int, bits: bool) -> bytes:
+    if bits:
+        return unpack_bits(reader.read((size + 7) // 8), size)
+    return reader.runs(size)
+
+
+# Функция восстановления сетки, закодированной encode_grid
+def decode_grid(reader: SaveReader, grid, bits: bool):
+    if not isinstance(grid, ChunkedGrid):
+        grid.load(read_cells(reader, grid.width * grid.height, bits))
+        return
+    default, count = reader.unpack(CHUNKED_RECORD)
+    grid.fill(default)
+    for _ in range(count):
+        chunk_x, chunk_y = reader.unpack(CHUNK_RECORD)
+        if chunk_x >= grid.chunks_x or chunk_y >= grid.chunks_y:
+            raise ValueError("Файл сохранения поврежден")
+        grid.load_chunk(chunk_x, chunk_y, read_cells(reader, CHUNK_SIZE * CHUNK_SIZE, bits))
+
+
+# Функция упаковки состояния генератора случайных чисел
+def encode_rng(rng: random.Random) -> bytes:
+    version, state, gauss = rng.getstate()
+    return RNG_RECORD.pack(version, *state, gauss is not None, gauss or 0.0)
+
+
+# Функция восстановления состояния генератора случайных чисел
+def decode_rng(reader: SaveReader, rng: random.Random):
+    values = reader.unpack(RNG_RECORD)
+    gauss = values[-1] if values[-2] else None
+    rng.setstate((values[0], tuple(values[1:626]), gauss))
+
+
+# Функция кодирования карты уровня
+def encode_map(game_map: GameMap) -> bytes:
+    exit_x, exit_y = game_map.exit_pos or (-1, -1)
+    parts = [MAP_RECORD.pack(game_map.width, game_map.height, exit_x, exit_y, game_map.zone_turn),
+             encode_grid(game_map.tiles, False),
+             encode_grid(game_map.visible, True),
+             encode_grid(game_map.explored, True),
+             SHORT_COUNT.pack(len(game_map.rooms))]
+    parts += [ROOM_RECORD.pack(*room) for room in game_map.rooms]
+    parts.append(SHORT_COUNT.pack(len(game_map.explored_rooms)))
+    parts += [SHORT_COUNT.pack(index) for index in sorted(game_map.explored_rooms)]
+
+    zones = [(expiry, x, y, damage) for expiry, bucket in sorted(game_map._zone_expiry.items())
+             for x, y, damage in bucket]
+    parts.append(COUNT.pack(len(zones)))
+    parts += [ZONE_RECORD.pack(*zone) for zone in zones]
+    return b"".join(parts)
+
+
+# Функция восстановления карты уровня
+def decode_map(reader: SaveReader, level: int) -> GameMap:
+    width, height, exit_x, exit_y, zone_turn = reader.unpack(MAP_RECORD)
+    game_map = GameMap(width, height, level, generate=False)
+    decode_grid(reader, game_map.tiles, False)
+    decode_grid(reader, game_map.visible, True)
+    decode_grid(reader, game_map.explored, True)
+    game_map.exit_pos = (exit_x, exit_y) if exit_x >= 0 else None
+
+    for index in range(reader.unpack(SHORT_COUNT)[0]):
+        room = reader.unpack(ROOM_RECORD)
+        game_map._mark_room(room, index)
+        game_map.rooms.append(room)
+    game_map.explored_rooms = {reader.unpack(SHORT_COUNT)[0] for _ in range(reader.unpack(SHORT_COUNT)[0])}
+
+    game_map.zone_turn = zone_turn
+    for _ in range(reader.count()):
+        expiry, x, y, damage = reader.unpack(ZONE_RECORD)
+        game_map._zone_expiry.setdefault(expiry, []).append((x, y, damage))
+        game_map.damage_zones[(x, y)] = game_map.damage_zones.get((x, y), 0) + damage
+    game_map.tiles_version += 1
+    return game_map
+
+
+# Функция кодирования сущности
+def encode_entity(entity: Entity, flags: int) -> bytes:
+    stats = entity.stats
+    return (ENTITY_RECORD.pack(entity.entity_type.value, flags, entity.x, entity.y,
+                               stats.hp, stats.max_hp, stats.attack, stats.defense, stats.speed,
+                               stats.vision_range, *entity.color)
+            + pack_str(entity.name) + pack_str(entity.char) + pack_str(entity.ai_state))
+
+
+# Функция восстановления сущности
+# return: Сущность и ее флаги
+def decode_entity(reader: SaveReader) -> Tuple[Entity, int]:
+    (etype, flags, x, y, hp, max_hp, attack, defense, speed, vision,
+     r, g, b) = reader.unpack(ENTITY_RECORD)
+    entity = Entity(
+        x=x, y=y,
+        entity_type=EntityType(etype),
+        stats=Stats(hp=hp, max_hp=max_hp, attack=attack, defense=defense, speed=speed, vision_range=vision),
+        is_alive=bool(flags & FLAG_ALIVE),
+        color=(r, g, b),
+    )
+    entity.name = reader.string()
+    entity.char = reader.string()
+    entity.ai_state = reader.string()
+    return entity, flags
+
+
+# Функция кодирования полного состояния игры
+# param game: Игра
+# return: Содержимое файла сохранения
+def encode_game(game) -> bytes:
+    parts = [HEADER.pack(SAVE_MAGIC, SAVE_VERSION),
+             GAME_RECORD.pack(game.seed, game.current_level, game.state.value, game.turn_count),
+             RESOURCES_RECORD.pack(game.resources.atp, game.resources.protein, game.resources.rna,
+                                   game.resources.max_atp, game.resources.max_protein, game.resources.max_rna)]
+    parts += [encode_rng(getattr(game.rng, name)) for name in RNG_STREAMS]
+    parts.append(encode_map(game.game_map))
+
+    # Сохраняются игрок и живые сущности, погибшие в очереди ходов пропускаются
+    saved = [e for e in game.entities if e is game.player or e.is_alive]
+    indices = {id(entity): index for index, entity in enumerate(saved)}
+    parts.append(SHORT_COUNT.pack(len(saved)))
+    for entity in saved:
+        flags = FLAG_ALIVE if entity.is_alive else 0
+        if entity is game.player:
+            flags |= FLAG_PLAYER
+        if entity.faction == FACTION_VIRUS:
+            flags |= FLAG_CLONE
+        parts.append(encode_entity(entity, flags))
+
+    scheduler = game.scheduler
+    queue = [(time, counter, indices[id(entity)]) for time, counter, entity in sorted(scheduler.queue, key=lambda entry: entry[:2])
+             if id(entity) in indices]
+    parts.append(SCHEDULER_RECORD.pack(scheduler.time, scheduler._counter))
+    parts.append(COUNT.pack(len(queue)))
+    parts += [SCHEDULE_RECORD.pack(*entry) for entry in queue]
+
+    mutations = [MUTATIONS.index(mutation) for mutation in game.available_mutations]
+    parts.append(bytes((len(mutations),)) + bytes(mutations))
+
+    messages = list(game.message_log.messages)
+    parts.append(SHORT_COUNT.pack(len(messages)))
+    for text, color in messages:
+        parts.append(pack_str(text) + COLOR.pack(*color))
+    return b"".join(parts)
+
+
+# Функция восстановления полного состояния игры
+# Состояние сначала читается целиком и только потом переносится в игру,
+# поэтому поврежденный файл не портит текущий забег
+# param game: Игра
+# param data: Содержимое файла сохранения
+def decode_game(game, data: bytes):
+    try:
+        reader = SaveReader(data)
+        magic, version = reader.unpack(HEADER)
+        if magic != SAVE_MAGIC:
+            raise ValueError("Файл не является сохранением игры")
+        if version != SAVE_VERSION:
+            raise ValueError(f"Неподдерживаемая версия сохранения: {version}")
+
+        seed, level, state, turn_count = reader.unpack(GAME_RECORD)
+        resources = Resources(*reader.unpack(RESOURCES_RECORD))
+        streams = RandomStreams(seed)
+        for name in RNG_STREAMS:
+            decode_rng(reader, getattr(streams, name))
+        game_map = decode_map(reader, level)
+
+        entities: List[Entity] = []
+        player: Optional[Entity] = None
+        for _ in range(reader.unpack(SHORT_COUNT)[0]):
+            entity, flags = decode_entity(reader)
+            entities.append(entity)
+            if flags & FLAG_PLAYER:
+                player = entity
+            if entity.is_alive:
+                game_map.place_entity(entity)
+        if player is None:
+            raise ValueError("В сохранении нет игрока")
+
+        time, counter = reader.unpack(SCHEDULER_RECORD)
+        queue = []
+        for _ in range(reader.count()):
+            next_time, order, index = reader.unpack(SCHEDULE_RECORD)
+            queue.append((next_time, order, entities[index]))
+
+        mutations = [MUTATIONS[index] for index in reader.read(reader.read(1)[0])]
+
+        message_log = MessageLog()
+        for _ in range(reader.unpack(SHORT_COUNT)[0]):
+            text = reader.string()
+            message_log.add(text, reader.unpack(COLOR))
+        state = GameState(state)
+    except (struct.error, IndexError, UnicodeDecodeError) as error:
+        raise ValueError("Файл сохранения поврежден") from error
+
+    game.seed = seed
+    game.rng = streams
+    game.current_level = level
+    game.turn_count = turn_count
+    game.state = state
+    game.resources = resources
+    game.game_map = game_map
+    game.player = player
+    game.entities = EntityRegistry(entities)
+    game.available_mutations = mutations
+    game.message_log.messages = message_log.messages
+    game.scheduler.time = time
+    game.scheduler._counter = counter
+    game.scheduler.queue = sorted(queue, key=lambda entry: entry[:2])
+
+
+# Функция сохранения игры в файл
+# Данные пишутся во временный файл и подменяют старое сохранение целиком
+def save_game(game, path: str):
+    data = encode_game(game)
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as file:
+        file.write(data)
+    os.replace(temp_path, path)
+
+
+# Функция загрузки игры из файла
+# return: Содержимое файла сохранения
+def load_game(game, path: str) -> bytes:
+    with open(path, "rb") as file:
+        data = file.read()
+    decode_game(game, data)
+    return data
@@ -0,0 +1,59 @@
+# scheduler.py
+import heapq
+from entities import Entity
+
+from typing import Iterator, List, Optional, Tuple
+
+# Время одного действия при скорости 1 (делится на скорость сущности)
+TIME_PER_ACTION = 1000
+
+
+# Функция расчета времени между действиями сущности
+# param speed: Скорость сущности
+def action_delay(speed: int) -> int:
+    return TIME_PER_ACTION // max(1, speed)
+
+
+# Класс планировщика ходов по энергии: куча сущностей по времени следующего действия
+# За ход игрока извлекаются только те, чье время наступило, быстрые сущности ходят чаще медленных
+class TurnScheduler:
+    def __init__(self):
+        self.time = 0
+        # Элементы кучи: (время действия, порядковый номер, сущность)
+        self.queue: List[Tuple[int, int, Entity]] = []
+        self._counter = 0
+
+    # Функция очистки очереди (новый уровень)
+    def clear(self):
+        self.time = 0
+        self.queue = []
+        self._counter = 0
+
+    # Функция добавления сущности, первое действие - через одну задержку
+    def add(self, entity: Entity, next_time: Optional[int] = None):
+        if next_time is None:
+            next_time = self.time + action_delay(entity.stats.speed)
+        heapq.heappush(self.queue, (next_time, self._counter, entity))
+        self._counter += 1
+
+    # Функция получения сущностей, чье действие наступит не позже end_time (очередь не меняется)
+    # return: Живые сущности в порядке их действий
+    def upcoming(self, end_time: int) -> List[Entity]:
+        return [entity for _, _, entity in sorted(item for item in self.queue if item[0] <= end_time)
+                if entity.is_alive]
+
+    # Функция продвижения времени с выдачей готовых к действию сущностей
+    # param duration: Длительность хода игрока
+    # return: Итератор сущностей в порядке времени их действий
+    def advance(self, duration: int) -> Iterator[Entity]:
+        end_time = self.time + duration
+        while self.queue and self.queue[0][0] <= end_time:
+            next_time, _, entity = heapq.heappop(self.queue)
+            # Погибшие сущности выпадают из очереди при извлечении
+            if not entity.is_alive:
+                continue
+            self.time = next_time
+            yield entity
+            if entity.is_alive:
+                self.add(entity, next_time + action_delay(entity.stats.speed))
+        self.time = end_time
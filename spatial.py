@@ -0,0 +1,160 @@
+# spatial.py
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from entities import Entity
+
+# Сторона корзины пространственного индекса в тайлах
+SPATIAL_CELL_SIZE = 8
+
+# Ключ корзины: (корзина x, корзина y)
+BucketKey = Tuple[int, int]
+
+
+# Класс пространственного индекса на равномерной сетке корзин
+# Сущности хранятся в корзинах по стороне и положению, поэтому запросы "все сущности
+# стороны в радиусе" и "k ближайших" обходят только корзины рядом с точкой.
+# Индекс обновляется при каждом перемещении сущности (см. GameMap.move_entity)
+class SpatialHash:
+    # param cell_size: Сторона корзины в тайлах
+    def __init__(self, cell_size: int = SPATIAL_CELL_SIZE):
+        self.cell_size = cell_size
+        # Сторона -> непустые корзины стороны
+        self.grids: Dict[int, Dict[BucketKey, Dict[Entity, None]]] = {}
+        # Сущность -> ключ ее корзины
+        self.keys: Dict[Entity, BucketKey] = {}
+        # Сторона -> число сущностей в индексе
+        self.counts: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, entity: Entity) -> bool:
+        return entity in self.keys
+
+    # Функция добавления сущности (для уже добавленной - обновление положения)
+    def insert(self, entity: Entity):
+        if entity in self.keys:
+            self.update(entity)
+            return
+        key = (entity.x // self.cell_size, entity.y // self.cell_size)
+        self.grids.setdefault(entity.faction, {}).setdefault(key, {})[entity] = None
+        self.keys[entity] = key
+        self.counts[entity.faction] = self.counts.get(entity.faction, 0) + 1
+
+    # Функция удаления сущности
+    def remove(self, entity: Entity):
+        key = self.keys.pop(entity, None)
+        if key is None:
+            return
+        self._discard(entity, key)
+        self.counts[entity.faction] -= 1
+
+    # Функция обновления корзины после изменения координат сущности
+    def update(self, entity: Entity):
+        key = self.keys.get(entity)
+        if key is None:
+            return
+        # Большинство шагов не выходит за пределы корзины
+        new_key = (entity.x // self.cell_size, entity.y // self.cell_size)
+        if new_key == key:
+            return
+        self._discard(entity, key)
+        self.grids[entity.faction].setdefault(new_key, {})[entity] = None
+        self.keys[entity] = new_key
+
+    # Функция удаления сущности из корзины (пустые корзины не хранятся)
+    def _discard(self, entity: Entity, key: BucketKey):
+        grid = self.grids[entity.faction]
+        bucket = grid[key]
+        del bucket[entity]
+        if not bucket:
+            del grid[key]
+
+    # Функция сортировки найденных сущностей по расстоянию
+    # При равенстве расстояний порядок задает rank, иначе результат зависел бы от истории перемещений
+    @staticmethod
+    def _sorted(found: List[Tuple[int, Entity]], rank: Optional[Callable[[Entity], int]]) -> List[Tuple[int, Entity]]:
+        if rank is None:
+            return sorted(found, key=lambda item: item[0])
+        return sorted(found, key=lambda item: (item[0], rank(item[1])))
+
+    # Функция получения корзин сторон
+    def _grids(self, factions: Iterable[int]) -> List[Dict[BucketKey, Dict[Entity, None]]]:
+        return [self.grids[faction] for faction in factions if self.grids.get(faction)]
+
+    # Функция поиска сущностей сторон в радиусе от точки
+    # param radius: Радиус (евклидов, граница включается)
+    # param factions: Стороны (FACTION_*)
+    # param rank: Порядок при равных расстояниях (например, EntityRegistry.order_of)
+    # return: Сущности по возрастанию расстояния
+    def in_radius(self, x: int, y: int, radius: float, factions: Iterable[int],
+                  rank: Optional[Callable[[Entity], int]] = None) -> List[Entity]:
+        limit = radius * radius
+        reach = int(radius)
+        size = self.cell_size
+        x0, x1 = (x - reach) // size, (x + reach) // size
+        y0, y1 = (y - reach) // size, (y + reach) // size
+
+        found = []
+        for grid in self._grids(factions):
+            # При большом радиусе дешевле пройти по непустым корзинам стороны
+            if (x1 - x0 + 1) * (y1 - y0 + 1) > len(grid):
+                buckets = [bucket for (bx, by), bucket in grid.items() if x0 <= bx <= x1 and y0 <= by <= y1]
+            else:
+                buckets = [grid.get((bx, by)) for bx in range(x0, x1 + 1) for by in range(y0, y1 + 1)]
+            for bucket in buckets:
+                if bucket:
+                    for entity in bucket:
+                        distance = (entity.x - x) ** 2 + (entity.y - y) ** 2
+                        if distance <= limit:
+                            found.append((distance, entity))
+        return [entity for _, entity in self._sorted(found, rank)]
+
+    # Функция поиска k ближайших сущностей сторон: обход колец корзин от точки,
+    # пока k-я найденная не окажется ближе любой сущности в необойденных корзинах
+    # param factions: Стороны (FACTION_*)
+    # param k: Количество сущностей
+    # param rank: Порядок при равных расстояниях (например, EntityRegistry.order_of)
+    # return: До k сущностей по возрастанию расстояния
+    def nearest(self, x: int, y: int, factions: Iterable[int], k: int = 1,
+                rank: Optional[Callable[[Entity], int]] = None) -> List[Entity]:
+        grids = self._grids(factions)
+        total = sum(len(bucket) for grid in grids for bucket in grid.values()) if grids else 0
+        k = min(k, total)
+        if k <= 0:
+            return []
+
+        size = self.cell_size
+        center_x, center_y = x // size, y // size
+        bucket_count = sum(len(grid) for grid in grids)
+        found: List[Tuple[int, Entity]] = []
+        ring = 0
+        while len(found) < total:
+            # Кольцо шире числа непустых корзин - дешевле добрать всех остальных напрямую
+            if (2 * ring + 1) ** 2 > bucket_count:
+                found = [((entity.x - x) ** 2 + (entity.y - y) ** 2, entity)
+                         for grid in grids for bucket in grid.values() for entity in bucket]
+                break
+
+            if ring == 0:
+                cells = [(center_x, center_y)]
+            else:
+                left, right = center_x - ring, center_x + ring
+                bottom, top = center_y - ring, center_y + ring
+                cells = [(bx, bottom) for bx in range(left, right + 1)]
+                cells += [(bx, top) for bx in range(left, right + 1)]
+                cells += [(left, by) for by in range(bottom + 1, top)]
+                cells += [(right, by) for by in range(bottom + 1, top)]
+            for cell in cells:
+                for grid in grids:
+                    bucket = grid.get(cell)
+                    if bucket:
+                        found.extend(((entity.x - x) ** 2 + (entity.y - y) ** 2, entity) for entity in bucket)
+
+            # Любая сущность за пройденными кольцами дальше ring * size клеток хотя бы по одной оси
+            if len(found) >= k:
+                bound = ring * size + 1
+                if sorted(distance for distance, _ in found)[k - 1] < bound * bound:
+                    break
+            ring += 1
+        return [entity for _, entity in self._sorted(found, rank)[:k]]
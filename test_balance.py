@@ -0,0 +1,22 @@
+# test_balance.py
+from balance import BALANCE_SEED, play_game
+from constants import GameState, MAX_LEVEL
+from headless import HeadlessGame
+
+
+# Проверка: выход с зачищенного последнего уровня засчитывается победой
+def test_cleared_last_level_is_victory():
+    runner = HeadlessGame()
+    runner.new_game(BALANCE_SEED)
+    game = runner.game
+    game.current_level = MAX_LEVEL
+    game.generate_level()
+    for enemy in list(game.entities.enemies):
+        enemy.is_alive = False
+        game.remove_dead(enemy)
+
+    run = play_game(runner, BALANCE_SEED, 5000)
+    assert run["outcome"] == "victory"
+    assert game.state == GameState.VICTORY
+    assert game.current_level == MAX_LEVEL + 1
+    assert [record["result"] for record in run["levels"]] == ["cleared"]
@@ -0,0 +1,60 @@
+# test_spatial.py
+import random
+
+from spatial import SpatialHash
+
+
+# Минимальная сущность для индекса: координаты, сторона и номер для порядка при равных расстояниях
+class Point:
+    def __init__(self, index: int, x: int, y: int, faction: int):
+        self.index = index
+        self.x = x
+        self.y = y
+        self.faction = faction
+
+
+# Функция построения случайного индекса с перемещениями и удалениями
+# return: Индекс и сущности, оставшиеся в нем
+def random_index(rng: random.Random):
+    spatial = SpatialHash(rng.choice([4, 8, 16]))
+    points = []
+    for index in range(rng.randint(0, 60)):
+        point = Point(index, rng.randint(0, 120), rng.randint(0, 120), rng.randint(0, 2))
+        points.append(point)
+        spatial.insert(point)
+    for _ in range(50):
+        if not points:
+            break
+        point = rng.choice(points)
+        if rng.random() < 0.5:
+            point.x, point.y = rng.randint(0, 120), rng.randint(0, 120)
+            spatial.update(point)
+        elif rng.random() < 0.2:
+            spatial.remove(point)
+            points.remove(point)
+    return spatial, points
+
+
+# Функция полного перебора: сущности сторон по возрастанию расстояния, затем номера
+def brute_force(points, x: int, y: int, factions):
+    found = [point for point in points if point.faction in factions]
+    return sorted(found, key=lambda point: ((point.x - x) ** 2 + (point.y - y) ** 2, point.index))
+
+
+# Проверка: запросы индекса совпадают с полным перебором
+def test_queries_match_brute_force():
+    rng = random.Random(5)
+    rank = lambda point: point.index
+    for _ in range(300):
+        spatial, points = random_index(rng)
+        for _ in range(20):
+            x, y = rng.randint(-10, 130), rng.randint(-10, 130)
+            factions = tuple(rng.sample([0, 1, 2], rng.randint(1, 3)))
+            expected = brute_force(points, x, y, factions)
+
+            k = rng.randint(1, 6)
+            assert spatial.nearest(x, y, factions, k, rank) == expected[:k]
+
+            radius = rng.choice([0, 1, 1.5, 5, rng.uniform(0, 50), 200])
+            inside = [point for point in expected if (point.x - x) ** 2 + (point.y - y) ** 2 <= radius * radius]
+            assert spatial.in_radius(x, y, radius, factions, rank) == inside
@@ -0,0 +1,62 @@
+# text_cache.py
+import arcade
+
+from collections import OrderedDict
+from typing import Optional, Tuple, Union
+
+from perf import PerfStats
+
+# Шрифт по умолчанию, как у arcade.draw_text
+DEFAULT_FONT = ("calibri", "arial")
+
+
+# Класс кэша объектов arcade.Text с вытеснением давно не использованных (LRU)
+# Раскладка глифов выполняется один раз на строку, при повторной отрисовке меняются только позиция и цвет
+class TextCache:
+    # param max_size: Максимальное количество хранимых надписей
+    # param perf: Статистика производительности, в которой считаются отрисовки надписей
+    def __init__(self, max_size: int = 512, perf: Optional[PerfStats] = None):
+        self.max_size = max_size
+        self.perf = perf
+        # (текст, шрифт, размер, привязка X, привязка Y) -> [надпись, x, y, цвет]
+        self._texts: OrderedDict = OrderedDict()
+
+    # Функция отрисовки текста через кэш (аргументы совпадают с arcade.draw_text)
+    # param text: Строка для отрисовки
+    # param x: X координата привязки
+    # param y: Y координата привязки
+    # param color: Цвет текста
+    # param font_size: Размер шрифта
+    # param anchor_x: Горизонтальная привязка
+    # param anchor_y: Вертикальная привязка
+    # param font_name: Имя шрифта
+    def draw(self, text: str, x: float, y: float, color: Tuple[int, ...] = (255, 255, 255),
+             font_size: float = 12, anchor_x: str = "left", anchor_y: str = "baseline",
+             font_name: Union[str, Tuple[str, ...]] = DEFAULT_FONT):
+        key = (text, font_name, font_size, anchor_x, anchor_y)
+        entry = self._texts.get(key)
+
+        if entry is None:
+            label = arcade.Text(text, x, y, color, font_size,
+                                anchor_x=anchor_x, anchor_y=anchor_y, font_name=font_name)
+            entry = [label, x, y, color]
+            self._texts[key] = entry
+            if len(self._texts) > self.max_size:
+                self._texts.popitem(last=False)
+        else:
+            self._texts.move_to_end(key)
+            label = entry[0]
+            if entry[1] != x or entry[2] != y:
+                label.position = (x, y)
+                entry[1], entry[2] = x, y
+            if entry[3] != color:
+                label.color = color
+                entry[3] = color
+
+        label.draw()
+        if self.perf is not None:
+            self.perf.count_draws()
+
+    # Функция очистки кэша
+    def clear(self):
+        self._texts.clear()
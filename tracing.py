@@ -0,0 +1,124 @@
+# tracing.py
+import functools
+import json
+import os
+import threading
+from collections import deque
+from time import perf_counter_ns
+from typing import Callable, Deque, List, Optional, Tuple
+
+# Запись интервала: (имя, категория, начало в нс, длительность в нс, поток)
+Span = Tuple[str, str, int, int, int]
+
+
+# Класс интервала трассировки для использования в with
+class _SpanContext:
+    __slots__ = ("tracer", "name", "category", "start")
+
+    def __init__(self, tracer: "Tracer", name: str, category: str):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.start = 0
+
+    def __enter__(self):
+        self.start = perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.record(self.name, self.category, self.start, perf_counter_ns() - self.start)
+        return False
+
+
+# Класс пустого интервала для выключенной трассировки
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+# Класс трассировщика: интервалы пишутся в кольцевой буфер и выгружаются в формате Chrome trace
+# Пока трассировка выключена, интервалы не создаются и не записываются
+class Tracer:
+    # param capacity: Количество последних хранимых интервалов
+    def __init__(self, capacity: int = 200000):
+        self.enabled = False
+        self.spans: Deque[Span] = deque(maxlen=capacity)
+        # Обработчики завершенных интервалов: hook(имя, категория, начало, длительность)
+        self.hooks: List[Callable[[str, str, int, int], None]] = []
+        self._origin = perf_counter_ns()
+
+    # Функция включения трассировки (буфер очищается)
+    def start(self):
+        self.spans.clear()
+        self._origin = perf_counter_ns()
+        self.enabled = True
+
+    # Функция выключения трассировки (записанные интервалы сохраняются)
+    def stop(self):
+        self.enabled = False
+
+    # Функция получения интервала для использования в with
+    # param name: Имя интервала
+    # param category: Категория (подсистема)
+    def span(self, name: str, category: str = "game"):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _SpanContext(self, name, category)
+
+    # Функция записи завершенного интервала
+    def record(self, name: str, category: str, start: int, duration: int):
+        self.spans.append((name, category, start, duration, threading.get_ident()))
+        for hook in self.hooks:
+            hook(name, category, start, duration)
+
+    # Функция получения событий в формате Chrome trace (полные события "X", время в мкс)
+    def chrome_events(self) -> List[dict]:
+        pid = os.getpid()
+        origin = self._origin
+        return [{"name": name, "cat": category, "ph": "X",
+                 "ts": (start - origin) / 1000, "dur": duration / 1000,
+                 "pid": pid, "tid": tid}
+                for name, category, start, duration, tid in self.spans]
+
+    # Функция выгрузки интервалов в JSON для chrome://tracing и Perfetto
+    # param path: Путь к файлу
+    def export_chrome_trace(self, path: str):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({"traceEvents": self.chrome_events(), "displayTimeUnit": "ms"}, file)
+
+
+# Общий трассировщик игры
+tracer = Tracer()
+
+
+# Функция получения интервала общего трассировщика
+def span(name: str, category: str = "game"):
+    return tracer.span(name, category)
+
+
+# Декоратор трассировки функции или метода общим трассировщиком
+# param name: Имя интервала (по умолчанию - полное имя функции)
+# param category: Категория (подсистема)
+def traced(name: Optional[str] = None, category: str = "game") -> Callable:
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            start = perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                tracer.record(span_name, category, start, perf_counter_ns() - start)
+        return wrapper
+    return decorator
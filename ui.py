@@ -1,525 +1,549 @@
-# ui.py
-import arcade
-from constants import *
-from entities import Entity, Resources, Mutation
-from game_map import GameMap
-
-from collections import deque
-from typing import List, Tuple, Deque
-
-
-# Класс отвечающий за хранение и управление журналом сообщений игры
-class MessageLog:
-    def __init__(self, max_messages: int = 50):
-        # Хранилище сообщений в виде очереди с ограниченной длиной
-        self.messages: Deque[Tuple[str, Tuple[int, int, int]]] = deque(maxlen=max_messages)
-
-    # Функция добавления нового сообщения в журнал
-    # param text: Текст сообщения
-    # param color: Цвет текста сообщения
-    def add(self, text: str, color: Tuple[int, int, int] = WHITE):
-        self.messages.append((text, color))
-
-    # Функция получения последних сообщений из журнала
-    # param count: Количество возвращаемых сообщений
-    # return: Список последних сообщений
-    def get_recent(self, count: int = 6) -> List[Tuple[str, Tuple[int, int, int]]]:
-        return list(self.messages)[-count:]
-
-    # Функция очистки журнала сообщений
-    def clear(self):
-        self.messages.clear()
-
-
-# Класс отвечающий за графический интерфейс игры
-class UI:
-    def __init__(self, window: arcade.Window):
-        self.window = window
-        font_path = "a_BighausTitulBrk_ExtraBold.ttf"
-
-        # Загружаем пользовательский шрифт
-        arcade.load_font(font_path)
-        self.font_name = "a_BighausTitulBrk ExtraBold"  # Имя шрифта без расширения .ttf
-
-        # Размеры шрифтов для разных элементов интерфейса
-        self.font_size = 16
-        self.large_font_size = 32
-        self.small_font_size = 12
-        self.title_font_size = 48
-
-    # Функция рисования залитого прямоугольника от левого нижнего угла
-    # param x: X координата левого нижнего угла
-    # param y: Y координата левого нижнего угла
-    # param width: Ширина прямоугольника
-    # param height: Высота прямоугольника
-    # param color: Цвет заливки
-    def draw_lbwh_rectangle_filled(self, x, y, width, height, color):
-        # Конвертация координат для Arcade (лево-право-низ-верх)
-        left = x
-        right = x + width
-        bottom = y
-        top = y + height
-        arcade.draw_lrbt_rectangle_filled(left, right, bottom, top, color)
-
-    # Функция рисования контура прямоугольника от левого нижнего угла
-    # param x: X координата левого нижнего угла
-    # param y: Y координата левого нижнего угла
-    # param width: Ширина прямоугольника
-    # param height: Высота прямоугольника
-    # param color: Цвет контура
-    # param border_width: Толщина линии контура
-    def draw_lbwh_rectangle_outline(self, x, y, width, height, color, border_width):
-        # Конвертация координат для Arcade
-        left = x
-        right = x + width
-        bottom = y
-        top = y + height
-        arcade.draw_lrbt_rectangle_outline(left, right, bottom, top, color, border_width)
-
-    # Функция отрисовки игровой карты с сущностями
-    # param game_map: Объект карты игры
-    # param entities: Список сущностей на карте
-    # param camera_x: X координата камеры
-    # param camera_y: Y координата камеры
-    # param player: Объект игрока
-    def render_map(self, game_map: GameMap, entities: List[Entity],
-                   camera_x: int, camera_y: int, player: Entity):
-        # Вычисление размеров видимой области в тайлах
-        view_width = SCREEN_WIDTH // TILE_SIZE
-        view_height = (SCREEN_HEIGHT - 150) // TILE_SIZE
-
-        # Отрисовка тайлов карты
-        for screen_x in range(view_width):
-            for screen_y in range(view_height):
-                map_x = screen_x + camera_x
-                map_y = screen_y + camera_y
-
-                if 0 <= map_x < game_map.width and 0 <= map_y < game_map.height:
-                    pixel_x = screen_x * TILE_SIZE
-                    pixel_y = screen_y * TILE_SIZE
-
-                    tile = game_map.tiles[map_x][map_y]
-                    visible = game_map.visible[map_x][map_y]
-                    explored = game_map.explored[map_x][map_y]
-
-                    # Отрисовка видимых тайлов
-                    if visible:
-                        # Определение цвета тайла в зависимости от его типа
-                        if tile == TileType.WALL:
-                            color = (60, 30, 40)
-                        elif tile == TileType.FLOOR:
-                            color = (30, 20, 25)
-                        elif tile == TileType.BLOOD_VESSEL:
-                            color = (80, 20, 30)
-                        elif tile == TileType.EXIT:
-                            color = (40, 80, 40)
-                        else:
-                            color = (30, 20, 25)
-
-                        self.draw_lbwh_rectangle_filled(pixel_x, pixel_y, TILE_SIZE, TILE_SIZE, color)
-
-                        # Отметка выхода с уровня
-                        if tile == TileType.EXIT:
-                            # Рамка выхода
-                            self.draw_lbwh_rectangle_outline(pixel_x + 4, pixel_y + 4,
-                                                             TILE_SIZE - 8, TILE_SIZE - 8, GREEN, 2)
-                            # Символ выхода
-                            arcade.draw_text(">",
-                                             pixel_x + TILE_SIZE // 2,
-                                             pixel_y + TILE_SIZE // 2,
-                                             GREEN, self.small_font_size,
-                                             anchor_x="center", anchor_y="center",
-                                             font_name=self.font_name)
-
-                        # Отображение зон нанесения урона
-                        for zx, zy, _, _ in game_map.damage_zones:
-                            if zx == map_x and zy == map_y:
-                                self.draw_lbwh_rectangle_outline(pixel_x + 2, pixel_y + 2,
-                                                                 TILE_SIZE - 4, TILE_SIZE - 4,
-                                                                 (100, 50, 0), 2)
-
-                    # Отрисовка исследованных тайлов
-                    elif explored:
-                        color = (20, 15, 18)
-                        self.draw_lbwh_rectangle_filled(pixel_x, pixel_y, TILE_SIZE, TILE_SIZE, color)
-
-        # Отрисовка сущностей на карте
-        for entity in entities:
-            if not entity.is_alive:
-                continue
-
-            screen_x = (entity.x - camera_x) * TILE_SIZE
-            screen_y = (entity.y - camera_y) * TILE_SIZE
-
-            if 0 <= entity.x < game_map.width and 0 <= entity.y < game_map.height:
-                # Показываем сущность только если она видима или это игрок
-                if game_map.visible[entity.x][entity.y] or entity == player:
-                    # Фон для сущности
-                    self.draw_lbwh_rectangle_filled(screen_x + 4, screen_y + 4,
-                                                    TILE_SIZE - 8, TILE_SIZE - 8, entity.color)
-
-                    # Символ сущности
-                    arcade.draw_text(entity.char,
-                                     screen_x + TILE_SIZE // 2,
-                                     screen_y + TILE_SIZE // 2,
-                                     BLACK, self.font_size,
-                                     anchor_x="center", anchor_y="center",
-                                     font_name=self.font_name)
-
-                    # Полоска здоровья для врагов
-                    if entity != player and entity.entity_type != EntityType.VIRUS_CLONE:
-                        hp_ratio = entity.stats.hp / entity.stats.max_hp
-                        bar_width = TILE_SIZE - 8
-                        self.draw_lbwh_rectangle_filled(screen_x + 4, screen_y + TILE_SIZE - 12,
-                                                        bar_width, 3, DARK_RED)
-                        self.draw_lbwh_rectangle_filled(screen_x + 4, screen_y + TILE_SIZE - 12,
-                                                        int(bar_width * hp_ratio), 3, RED)
-
-    # Функция отрисовки панели интерфейса внизу экрана
-    # param player: Объект игрока
-    # param resources: Ресурсы игрока
-    # param message_log: Журнал сообщений
-    # param current_level: Текущий уровень
-    # param turn_count: Счетчик ходов
-    # param virus_clones: Список клонов вируса
-    # param enemies_count: Количество врагов
-    def render_ui_panel(self, player: Entity, resources: Resources, message_log: MessageLog,
-                        current_level: int, turn_count: int, virus_clones: list,
-                        enemies_count: int):
-        ui_y = SCREEN_HEIGHT - 145
-
-        # Фон панели интерфейса
-        self.draw_lbwh_rectangle_filled(0, ui_y, SCREEN_WIDTH, 145, (20, 15, 20))
-        arcade.draw_line(0, ui_y, SCREEN_WIDTH, ui_y, GRAY)
-
-        # Полоски здоровья и АТФ
-        self._render_bar(10, ui_y + 10, 200, 20, player.stats.hp, player.stats.max_hp, RED, DARK_RED, "HP")
-        self._render_bar(10, ui_y + 35, 200, 20, resources.atp, resources.max_atp, GREEN, DARK_GREEN, "ATP")
-
-        # Отображение ресурсов
-        arcade.draw_text(f"Белок: {resources.protein}/{resources.max_protein}",
-                         10, ui_y + 60, CYAN, self.font_size, font_name=self.font_name)
-        arcade.draw_text(f"РНК: {resources.rna}/{resources.max_rna}",
-                         10, ui_y + 80, PURPLE, self.font_size, font_name=self.font_name)
-
-        # Статистика игрока
-        stats_x = 230
-        arcade.draw_text(f"АТК: {player.stats.attack}", stats_x, ui_y + 10,
-                         WHITE, self.small_font_size, font_name=self.font_name)
-        arcade.draw_text(f"ЗАЩ: {player.stats.defense}", stats_x, ui_y + 28,
-                         WHITE, self.small_font_size, font_name=self.font_name)
-        arcade.draw_text(f"СКР: {player.stats.speed}", stats_x, ui_y + 46,
-                         WHITE, self.small_font_size, font_name=self.font_name)
-        arcade.draw_text(f"ОБЗ: {player.stats.vision_range}", stats_x, ui_y + 64,
-                         WHITE, self.small_font_size, font_name=self.font_name)
-
-        # Информация об уровне и ходе
-        arcade.draw_text(f"Уровень: {current_level}/13", stats_x, ui_y + 85,
-                         YELLOW, self.font_size, font_name=self.font_name)
-        arcade.draw_text(f"Ход: {turn_count}", stats_x, ui_y + 105,
-                         GRAY, self.small_font_size, font_name=self.font_name)
-
-        # Количество клонов и врагов
-        clones_count = len([c for c in virus_clones if c.is_alive])
-        arcade.draw_text(f"Клоны: {clones_count}", stats_x + 80, ui_y + 105,
-                         GREEN, self.small_font_size, font_name=self.font_name)
-        arcade.draw_text(f"Враги: {enemies_count}", stats_x, ui_y + 120,
-                         RED, self.small_font_size, font_name=self.font_name)
-
-        # Журнал сообщений
-        log_x = 380
-        messages = message_log.get_recent(6)
-        for i, (text, color) in enumerate(messages):
-            arcade.draw_text(text[:55], log_x, ui_y + 10 + i * 18,
-                             color, self.small_font_size, font_name=self.font_name)
-
-        # Подсказка по управлению
-        controls = "WASD: передвижение | SPACE: ожидание | C: клонирование | E: выход | ESC: пауза"
-        arcade.draw_text(controls, log_x, ui_y + 125, GRAY, self.small_font_size, font_name=self.font_name)
-
-    # Функция отрисовки полоски с показателем
-    # param x: X координата левого нижнего угла полоски
-    # param y: Y координата левого нижнего угла полоски
-    # param width: Ширина полоски
-    # param height: Высота полоски
-    # param value: Текущее значение
-    # param max_value: Максимальное значение
-    # param fg_color: Цвет заполненной части
-    # param bg_color: Цвет фона
-    # param label: Надпись полоски
-    def _render_bar(self, x: int, y: int, width: int, height: int,
-                    value: int, max_value: int, fg_color, bg_color, label: str):
-        # Фон полоски
-        self.draw_lbwh_rectangle_filled(x, y, width, height, bg_color)
-        # Заполненная часть
-        bar_width = int(width * (value / max_value)) if max_value > 0 else 0
-        self.draw_lbwh_rectangle_filled(x, y, bar_width, height, fg_color)
-        # Контур полоски
-        self.draw_lbwh_rectangle_outline(x, y, width, height, WHITE, 1)
-
-        # Текст с значениями
-        arcade.draw_text(f"{label}: {value}/{max_value}",
-                         x + width // 2, y + height // 2,
-                         WHITE, self.small_font_size,
-                         anchor_x="center", anchor_y="center",
-                         font_name=self.font_name)
-
-    # Функция отрисовки мини-карты
-    # param game_map: Объект карты игры
-    # param player: Объект игрока
-    # param entities: Список сущностей
-    # param x: X координата левого нижнего угла мини-карты
-    # param y: Y координата левого нижнего угла мини-карты
-    # param width: Ширина мини-карты
-    # param height: Высота мини-карты
-    def render_fullmap(self, game_map: GameMap, player: Entity, entities: List[Entity],
-                       x: int, y: int, width: int, height: int):
-        # Фон мини-карты
-        self.draw_lbwh_rectangle_filled(x, y, width, height, (20, 15, 20))
-        self.draw_lbwh_rectangle_outline(x, y, width, height, GRAY, 1)
-
-        # Коэффициенты масштабирования
-        scale_x = width / game_map.width
-        scale_y = height / game_map.height
-
-        # Поиск комнаты, в которой находится игрок
-        player_room = None
-        for room in game_map.rooms:
-            # Обработка разных форматов комнат
-            if isinstance(room, tuple):
-                if len(room) >= 4:
-                    left, top, right, bottom = room[:4]
-                    if left <= player.x < right and top <= player.y < bottom:
-                        player_room = room
-                        break
-            elif hasattr(room, 'contains'):
-                if room.contains(player.x, player.y):
-                    player_room = room
-                    break
-            elif hasattr(room, 'left') and hasattr(room, 'right') and hasattr(room, 'top') and hasattr(room, 'bottom'):
-                if room.left <= player.x < room.right and room.top <= player.y < room.bottom:
-                    player_room = room
-                    break
-
-        # Отрисовка комнат на мини-карте
-        for room in game_map.rooms:
-            # Получение границ комнаты
-            if isinstance(room, tuple):
-                if len(room) >= 4:
-                    left, top, right, bottom = room[:4]
-                else:
-                    continue
-            elif hasattr(room, 'left') and hasattr(room, 'right') and hasattr(room, 'top') and hasattr(room, 'bottom'):
-                left = room.left
-                top = room.top
-                right = room.right
-                bottom = room.bottom
-            else:
-                continue
-
-            # Расчет координат комнаты на мини-карте
-            rx = x + int(left * scale_x)
-            ry = y + int(top * scale_y)
-            rw = max(2, int((right - left) * scale_x))
-            rh = max(2, int((bottom - top) * scale_y))
-
-            # Определение цвета комнаты
-            if room == player_room:
-                room_color = (60, 80, 60)
-                border_color = GREEN
-            elif any(game_map.explored[tx][ty]
-                     for tx in range(left, min(right, game_map.width))
-                     for ty in range(top, min(bottom, game_map.height))):
-                room_color = (45, 40, 50)
-                border_color = (80, 70, 90)
-            else:
-                room_color = (25, 22, 28)
-                border_color = (40, 35, 45)
-
-            self.draw_lbwh_rectangle_filled(rx, ry, rw, rh, room_color)
-            self.draw_lbwh_rectangle_outline(rx, ry, rw, rh, border_color, 1)
-
-        # Отрисовка коридоров на мини-карте
-        for mx in range(game_map.width):
-            for my in range(game_map.height):
-                if game_map.explored[mx][my]:
-                    tile = game_map.tiles[mx][my]
-                    if tile != TileType.WALL:
-                        # Проверка, находится ли тайл в комнате
-                        in_room = False
-                        for room in game_map.rooms:
-                            if isinstance(room, tuple) and len(room) >= 4:
-                                left, top, right, bottom = room[:4]
-                                if left <= mx < right and top <= my < bottom:
-                                    in_room = True
-                                    break
-                            elif hasattr(room, 'contains'):
-                                if room.contains(mx, my):
-                                    in_room = True
-                                    break
-                            elif hasattr(room, 'left') and hasattr(room, 'right') and hasattr(room, 'top') and hasattr(
-                                    room, 'bottom'):
-                                if room.left <= mx < room.right and room.top <= my < room.bottom:
-                                    in_room = True
-                                    break
-
-                        # Отрисовка коридора
-                        if not in_room:
-                            px = x + int(mx * scale_x)
-                            py = y + int(my * scale_y)
-                            self.draw_lbwh_rectangle_filled(px, py,
-                                                            max(1, int(scale_x)),
-                                                            max(1, int(scale_y)),
-                                                            (50, 45, 55))
-
-        # Отрисовка выхода на мини-карте
-        if game_map.exit_pos:
-            ex = x + int(game_map.exit_pos[0] * scale_x)
-            ey = y + int(game_map.exit_pos[1] * scale_y)
-            arcade.draw_lbwh_rectangle_filled(ex + 2, ey + 2, 4, 4, GREEN)
-
-        # Отрисовка врагов на мини-карте
-        for entity in entities:
-            if entity.is_alive and entity != player and entity.entity_type != EntityType.VIRUS_CLONE:
-                if game_map.visible[entity.x][entity.y]:
-                    ex = x + int(entity.x * scale_x)
-                    ey = y + int(entity.y * scale_y)
-                    arcade.draw_lbwh_rectangle_filled(ex + 1.5, ey + 1.5, 3, 3, RED)
-
-        # Отрисовка клонов на мини-карте
-        for entity in entities:
-            if entity.is_alive and entity.entity_type == EntityType.VIRUS_CLONE:
-                cx = x + int(entity.x * scale_x)
-                cy = y + int(entity.y * scale_y)
-                arcade.draw_lbwh_rectangle_filled(cx + 1, cy + 1, 2, 2, (100, 200, 100))
-
-        # Отрисовка игрока на мини-карте
-        px = x + int(player.x * scale_x)
-        py = y + int(player.y * scale_y)
-        arcade.draw_lbwh_rectangle_filled(px + 2.5, py + 2.5, 5, 5, GREEN)
-        arcade.draw_lbwh_rectangle_outline(px + 2.5, py + 2.5, 5, 5, WHITE, 1)
-
-        # Подсчет исследованных комнат
-        explored_rooms = 0
-        for room in game_map.rooms:
-            if isinstance(room, tuple) and len(room) >= 4:
-                left, top, right, bottom = room[:4]
-            elif hasattr(room, 'left') and hasattr(room, 'right') and hasattr(room, 'top') and hasattr(room, 'bottom'):
-                left = room.left
-                top = room.top
-                right = room.right
-                bottom = room.bottom
-            else:
-                continue
-
-            if any(game_map.explored[tx][ty]
-                   for tx in range(left, min(right, game_map.width))
-                   for ty in range(top, min(bottom, game_map.height))):
-                explored_rooms += 1
-
-        # Отображение статистики комнат
-        arcade.draw_text(f"Комнат: {explored_rooms}/{len(game_map.rooms)}",
-                         x + 3, y + height - 18,
-                         GRAY, self.small_font_size, font_name=self.font_name)
-
-    # Функция отрисовки меню выбора мутаций
-    # param mutations: Список доступных мутаций
-    def render_evolution_menu(self, mutations: list):
-        # Затемнение фона
-        arcade.draw_lbwh_rectangle_filled(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2,
-                                     SCREEN_WIDTH, SCREEN_HEIGHT, (0, 0, 0, 180))
-
-        # Заголовок меню
-        arcade.draw_text("ЭВОЛЮЦИЯ", SCREEN_WIDTH // 2, 100,
-                         GREEN, self.large_font_size,
-                         anchor_x="center", font_name=self.font_name)
-
-        arcade.draw_text("Выберите мутацию (нажмите 1, 2 или 3)",
-                         SCREEN_WIDTH // 2, 150, WHITE, self.font_size,
-                         anchor_x="center", font_name=self.font_name)
-
-        # Отрисовка вариантов мутаций
-        for i, mutation in enumerate(mutations):
-            y_pos = 220 + i * 100
-            box_x = SCREEN_WIDTH // 2 - 200
-            box_y = y_pos
-            box_width = 400
-            box_height = 80
-
-            # Фон для варианта мутации
-            self.draw_lbwh_rectangle_filled(box_x, box_y, box_width, box_height, (40, 35, 40))
-            self.draw_lbwh_rectangle_outline(box_x, box_y, box_width, box_height, GREEN, 2)
-
-            # Номер варианта
-            arcade.draw_text(str(i + 1), box_x + 20, box_y + 20,
-                             GREEN, self.large_font_size, font_name=self.font_name)
-
-            # Название мутации
-            arcade.draw_text(mutation.name, box_x + 70, box_y + 15,
-                             WHITE, self.font_size, font_name=self.font_name)
-
-            # Описание мутации
-            arcade.draw_text(mutation.description, box_x + 70, box_y + 45,
-                             GRAY, self.small_font_size, font_name=self.font_name)
-
-    # Функция отрисовки экрана поражения
-    # param current_level: Текущий уровень
-    # param turn_count: Количество ходов
-    def render_game_over(self, current_level: int, turn_count: int):
-        # Затемнение фона
-        arcade.draw_lbwh_rectangle_filled(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2,
-                                     SCREEN_WIDTH, SCREEN_HEIGHT, (0, 0, 0, 200))
-
-        # Сообщение о поражении
-        arcade.draw_text("ВИРУС УНИЧТОЖЕН", SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 50,
-                         RED, self.large_font_size, anchor_x="center", font_name=self.font_name)
-
-        # Статистика игры
-        arcade.draw_text(f"Уровень: {current_level} | Ходы: {turn_count}",
-                         SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 20,
-                         WHITE, self.font_size, anchor_x="center", font_name=self.font_name)
-
-        # Подсказки по управлению
-        arcade.draw_text("R - перезапуск | ESC - меню",
-                         SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 70,
-                         YELLOW, self.font_size, anchor_x="center", font_name=self.font_name)
-
-    # Функция отрисовки экрана победы
-    # param turn_count: Количество ходов
-    def render_victory(self, turn_count: int):
-        # Затемнение фона
-        arcade.draw_lbwh_rectangle_filled(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2,
-                                     SCREEN_WIDTH, SCREEN_HEIGHT, (0, 0, 0, 200))
-
-        # Сообщение о победе
-        arcade.draw_text("ПОБЕДА!", SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 50,
-                         GREEN, self.large_font_size, anchor_x="center", font_name=self.font_name)
-
-        arcade.draw_text("Вы захватили контроль над организмом!",
-                         SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2,
-                         CYAN, self.font_size, anchor_x="center", font_name=self.font_name)
-
-        # Статистика игры
-        arcade.draw_text(f"Ходы: {turn_count}",
-                         SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 40,
-                         WHITE, self.font_size, anchor_x="center", font_name=self.font_name)
-
-        # Подсказки по управлению
-        arcade.draw_text("R - новая игра | ESC - меню",
-                         SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 90,
-                         YELLOW, self.font_size, anchor_x="center", font_name=self.font_name)
-
-    # Функция отрисовки экрана паузы
-    def render_pause(self):
-        # Затемнение фона
-        arcade.draw_lbwh_rectangle_filled(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2,
-                                     SCREEN_WIDTH, SCREEN_HEIGHT, (0, 0, 0, 180))
-
-        # Сообщение о паузе
-        arcade.draw_text("ПАУЗА", SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 50,
-                         WHITE, self.large_font_size, anchor_x="center", font_name=self.font_name)
-
-        # Подсказки по управлению
-        arcade.draw_text("ESC - продолжение | Q - в меню",
-                         SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 20,
-                         GRAY, self.font_size, anchor_x="center", font_name=self.font_name)
\ No newline at end of file
+# ui.py
+import arcade
+from assets import AssetManager
+from constants import *
+from entities import Entity, EntityRegistry, Resources, Mutation, FACTION_PLAYER, FACTION_VIRUS, FACTION_IMMUNE
+from game_map import GameMap
+from grid import CHUNK_SHIFT
+from message_log import MessageLog
+from perf import PerfStats
+from text_cache import TextCache, DEFAULT_FONT
+from tracing import traced
+
+from typing import Collection, List, Optional
+
+
+# Класс отвечающий за графический интерфейс игры
+class UI:
+    # param perf: Статистика производительности, в которой считаются вызовы отрисовки
+    def __init__(self, window: arcade.Window, assets: Optional[AssetManager] = None,
+                 perf: Optional[PerfStats] = None):
+        self.window = window
+        self.assets = assets or AssetManager()
+        self.perf = perf or PerfStats()
+
+        # Пользовательский шрифт загружается через менеджер ресурсов
+        self.font_name = self.assets.load_font(UI_FONT_PATH, UI_FONT_NAME)
+
+        # Размеры шрифтов для разных элементов интерфейса
+        self.font_size = 16
+        self.large_font_size = 32
+        self.small_font_size = 12
+        self.title_font_size = 48
+
+        # Кэш надписей интерфейса
+        self.texts = TextCache(perf=self.perf)
+
+        # Кэш слоя тайлов карты и ключ, при котором он был построен
+        self.map_layer: Optional[arcade.shape_list.ShapeElementList] = None
+        self.map_layer_texts: List[arcade.Text] = []
+        self.map_layer_key: Optional[tuple] = None
+
+        # Кэш мини-карты: фон с коридорами дописывается по новым исследованным клеткам
+        self.minimap_base: Optional[arcade.shape_list.ShapeElementList] = None
+        self.minimap_rooms: Optional[arcade.shape_list.ShapeElementList] = None
+        self.minimap_key: Optional[tuple] = None
+        self.minimap_rooms_key: Optional[tuple] = None
+
+        # Надписи наложения производительности и счетчик кадров до обновления их текста
+        self.perf_labels: List[arcade.Text] = []
+        self.perf_frame = 0
+
+    # Функция рисования залитого прямоугольника от левого нижнего угла
+    # param x: X координата левого нижнего угла
+    # param y: Y координата левого нижнего угла
+    # param width: Ширина прямоугольника
+    # param height: Высота прямоугольника
+    # param color: Цвет заливки
+    def draw_lbwh_rectangle_filled(self, x, y, width, height, color):
+        # Конвертация координат для Arcade (лево-право-низ-верх)
+        left = x
+        right = x + width
+        bottom = y
+        top = y + height
+        arcade.draw_lrbt_rectangle_filled(left, right, bottom, top, color)
+        self.perf.count_draws()
+
+    # Функция рисования контура прямоугольника от левого нижнего угла
+    # param x: X координата левого нижнего угла
+    # param y: Y координата левого нижнего угла
+    # param width: Ширина прямоугольника
+    # param height: Высота прямоугольника
+    # param color: Цвет контура
+    # param border_width: Толщина линии контура
+    def draw_lbwh_rectangle_outline(self, x, y, width, height, color, border_width):
+        # Конвертация координат для Arcade
+        left = x
+        right = x + width
+        bottom = y
+        top = y + height
+        arcade.draw_lrbt_rectangle_outline(left, right, bottom, top, color, border_width)
+        self.perf.count_draws()
+
+    # Функция отрисовки игровой карты с сущностями
+    # param game_map: Объект карты игры
+    # param camera_x: X координата камеры
+    # param camera_y: Y координата камеры
+    # param player: Объект игрока
+    @traced(category="render")
+    def render_map(self, game_map: GameMap, camera_x: int, camera_y: int, player: Entity):
+        # Вычисление размеров видимой области в тайлах
+        view_width = SCREEN_WIDTH // TILE_SIZE
+        view_height = (SCREEN_HEIGHT - 150) // TILE_SIZE
+
+        # Слой тайлов перестраивается только при изменении карты, видимости или камеры
+        layer_key = (game_map, game_map.tiles_version, game_map.visibility_version,
+                     game_map.zones_version, camera_x, camera_y)
+        if layer_key != self.map_layer_key:
+            self._build_map_layer(game_map, camera_x, camera_y, view_width, view_height)
+            self.map_layer_key = layer_key
+
+        # Отрисовка тайлов карты одним пакетом
+        self.map_layer.draw()
+        for text in self.map_layer_texts:
+            text.draw()
+        self.perf.count_draws(1 + len(self.map_layer_texts))
+
+        # Отрисовка сущностей на карте: видимые берутся из пространственного индекса,
+        # игрок показывается всегда
+        shown = game_map.visible_entities((FACTION_PLAYER, FACTION_VIRUS, FACTION_IMMUNE))
+        if player.is_alive and player not in shown:
+            shown.append(player)
+        for entity in shown:
+            screen_x = (entity.x - camera_x) * TILE_SIZE
+            screen_y = (entity.y - camera_y) * TILE_SIZE
+
+            if 0 <= entity.x < game_map.width and 0 <= entity.y < game_map.height:
+                # Фон для сущности
+                self.draw_lbwh_rectangle_filled(screen_x + 4, screen_y + 4,
+                                                TILE_SIZE - 8, TILE_SIZE - 8, entity.color)
+
+                # Символ сущности
+                self.texts.draw(entity.char,
+                                screen_x + TILE_SIZE // 2,
+                                screen_y + TILE_SIZE // 2,
+                                BLACK, self.font_size,
+                                anchor_x="center", anchor_y="center",
+                                font_name=self.font_name)
+
+                # Полоска здоровья для врагов
+                if entity != player and entity.entity_type != EntityType.VIRUS_CLONE:
+                    hp_ratio = entity.stats.hp / entity.stats.max_hp
+                    bar_width = TILE_SIZE - 8
+                    self.draw_lbwh_rectangle_filled(screen_x + 4, screen_y + TILE_SIZE - 12,
+                                                    bar_width, 3, DARK_RED)
+                    self.draw_lbwh_rectangle_filled(screen_x + 4, screen_y + TILE_SIZE - 12,
+                                                    int(bar_width * hp_ratio), 3, RED)
+
+    # Функция построения пакетного слоя тайлов для текущего положения камеры
+    # param game_map: Объект карты игры
+    # param camera_x: X координата камеры
+    # param camera_y: Y координата камеры
+    # param view_width: Ширина видимой области в тайлах
+    # param view_height: Высота видимой области в тайлах
+    def _build_map_layer(self, game_map: GameMap, camera_x: int, camera_y: int,
+                         view_width: int, view_height: int):
+        layer = arcade.shape_list.ShapeElementList()
+        texts = []
+        points = []
+        colors = []
+        outlines = []
+
+        x_start, x_end = max(0, camera_x), min(game_map.width, camera_x + view_width)
+        y_start, y_end = max(0, camera_y), min(game_map.height, camera_y + view_height)
+        explored = game_map.explored
+
+        # Обходятся только чанки под камерой; неисследованный чанк не содержит
+        # ни видимых, ни исследованных клеток и пропускается целиком
+        for chunk_x in range(x_start >> CHUNK_SHIFT, ((x_end - 1) >> CHUNK_SHIFT) + 1):
+            for chunk_y in range(y_start >> CHUNK_SHIFT, ((y_end - 1) >> CHUNK_SHIFT) + 1):
+                if explored.chunk_is_empty(chunk_x, chunk_y):
+                    continue
+                chunk_y_start = max(y_start, chunk_y << CHUNK_SHIFT)
+                chunk_y_end = min(y_end, (chunk_y + 1) << CHUNK_SHIFT)
+
+                for map_x in range(max(x_start, chunk_x << CHUNK_SHIFT), min(x_end, (chunk_x + 1) << CHUNK_SHIFT)):
+                    visible_column = game_map.visible[map_x]
+                    explored_column = explored[map_x]
+                    tiles_column = game_map.tiles[map_x]
+                    pixel_x = (map_x - camera_x) * TILE_SIZE
+
+                    for map_y in range(chunk_y_start, chunk_y_end):
+                        pixel_y = (map_y - camera_y) * TILE_SIZE
+
+                        # Видимые тайлы окрашиваются по типу, исследованные - затемненно
+                        if visible_column[map_y]:
+                            tile = tiles_column[map_y]
+                            color = TILE_COLORS.get(tile, (30, 20, 25))
+
+                            # Отметка выхода с уровня
+                            if tile == TileType.EXIT:
+                                outlines.append((pixel_x + 4, pixel_y + 4, TILE_SIZE - 8, TILE_SIZE - 8, GREEN))
+                                texts.append(arcade.Text(">",
+                                                         pixel_x + TILE_SIZE // 2,
+                                                         pixel_y + TILE_SIZE // 2,
+                                                         GREEN, self.small_font_size,
+                                                         anchor_x="center", anchor_y="center",
+                                                         font_name=self.font_name))
+                        elif explored_column[map_y]:
+                            color = (20, 15, 18)
+                        else:
+                            continue
+
+                        points += [(pixel_x, pixel_y), (pixel_x + TILE_SIZE, pixel_y),
+                                   (pixel_x + TILE_SIZE, pixel_y + TILE_SIZE), (pixel_x, pixel_y + TILE_SIZE)]
+                        colors += [color] * 4
+
+        # Отображение видимых зон нанесения урона
+        for zx, zy in game_map.damage_zones:
+            screen_x, screen_y = zx - camera_x, zy - camera_y
+            if 0 <= screen_x < view_width and 0 <= screen_y < view_height and game_map.visible[zx][zy]:
+                outlines.append((screen_x * TILE_SIZE + 2, screen_y * TILE_SIZE + 2,
+                                 TILE_SIZE - 4, TILE_SIZE - 4, (100, 50, 0)))
+
+        if points:
+            layer.append(arcade.shape_list.create_rectangles_filled_with_colors(points, colors))
+        for x, y, width, height, color in outlines:
+            layer.append(arcade.shape_list.create_rectangle_outline(x + width / 2, y + height / 2,
+                                                                    width, height, color, 2))
+
+        self.map_layer = layer
+        self.map_layer_texts = texts
+
+    # Функция отрисовки панели интерфейса внизу экрана
+    # param player: Объект игрока
+    # param resources: Ресурсы игрока
+    # param message_log: Журнал сообщений
+    # param current_level: Текущий уровень
+    # param turn_count: Счетчик ходов
+    # param virus_clones: Живые клоны вируса
+    # param enemies_count: Количество врагов
+    @traced(category="render")
+    def render_ui_panel(self, player: Entity, resources: Resources, message_log: MessageLog,
+                        current_level: int, turn_count: int, virus_clones: Collection[Entity],
+                        enemies_count: int):
+        ui_y = SCREEN_HEIGHT - 145
+
+        # Фон панели интерфейса
+        self.draw_lbwh_rectangle_filled(0, ui_y, SCREEN_WIDTH, 145, (20, 15, 20))
+        arcade.draw_line(0, ui_y, SCREEN_WIDTH, ui_y, GRAY)
+        self.perf.count_draws()
+
+        # Полоски здоровья и АТФ
+        self._render_bar(10, ui_y + 10, 200, 20, player.stats.hp, player.stats.max_hp, RED, DARK_RED, "HP")
+        self._render_bar(10, ui_y + 35, 200, 20, resources.atp, resources.max_atp, GREEN, DARK_GREEN, "ATP")
+
+        # Отображение ресурсов
+        self.texts.draw(f"Белок: {resources.protein}/{resources.max_protein}",
+                        10, ui_y + 60, CYAN, self.font_size, font_name=self.font_name)
+        self.texts.draw(f"РНК: {resources.rna}/{resources.max_rna}",
+                        10, ui_y + 80, PURPLE, self.font_size, font_name=self.font_name)
+
+        # Статистика игрока
+        stats_x = 230
+        self.texts.draw(f"АТК: {player.stats.attack}", stats_x, ui_y + 10,
+                        WHITE, self.small_font_size, font_name=self.font_name)
+        self.texts.draw(f"ЗАЩ: {player.stats.defense}", stats_x, ui_y + 28,
+                        WHITE, self.small_font_size, font_name=self.font_name)
+        self.texts.draw(f"СКР: {player.stats.speed}", stats_x, ui_y + 46,
+                        WHITE, self.small_font_size, font_name=self.font_name)
+        self.texts.draw(f"ОБЗ: {player.stats.vision_range}", stats_x, ui_y + 64,
+                        WHITE, self.small_font_size, font_name=self.font_name)
+
+        # Информация об уровне и ходе
+        self.texts.draw(f"Уровень: {current_level}/13", stats_x, ui_y + 85,
+                        YELLOW, self.font_size, font_name=self.font_name)
+        self.texts.draw(f"Ход: {turn_count}", stats_x, ui_y + 105,
+                        GRAY, self.small_font_size, font_name=self.font_name)
+
+        # Количество клонов и врагов
+        clones_count = len(virus_clones)
+        self.texts.draw(f"Клоны: {clones_count}", stats_x + 80, ui_y + 105,
+                        GREEN, self.small_font_size, font_name=self.font_name)
+        self.texts.draw(f"Враги: {enemies_count}", stats_x, ui_y + 120,
+                        RED, self.small_font_size, font_name=self.font_name)
+
+        # Журнал сообщений
+        log_x = 380
+        messages = message_log.get_recent(6)
+        for i, (text, color) in enumerate(messages):
+            self.texts.draw(text[:55], log_x, ui_y + 10 + i * 18,
+                            color, self.small_font_size, font_name=self.font_name)
+
+        # Подсказка по управлению
+        controls = "WASD: передвижение | SPACE: ожидание | C: клонирование | E: выход | ESC: пауза"
+        self.texts.draw(controls, log_x, ui_y + 125, GRAY, self.small_font_size, font_name=self.font_name)
+
+    # Функция отрисовки полоски с показателем
+    # param x: X координата левого нижнего угла полоски
+    # param y: Y координата левого нижнего угла полоски
+    # param width: Ширина полоски
+    # param height: Высота полоски
+    # param value: Текущее значение
+    # param max_value: Максимальное значение
+    # param fg_color: Цвет заполненной части
+    # param bg_color: Цвет фона
+    # param label: Надпись полоски
+    def _render_bar(self, x: int, y: int, width: int, height: int,
+                    value: int, max_value: int, fg_color, bg_color, label: str):
+        # Фон полоски
+        self.draw_lbwh_rectangle_filled(x, y, width, height, bg_color)
+        # Заполненная часть
+        bar_width = int(width * (value / max_value)) if max_value > 0 else 0
+        self.draw_lbwh_rectangle_filled(x, y, bar_width, height, fg_color)
+        # Контур полоски
+        self.draw_lbwh_rectangle_outline(x, y, width, height, WHITE, 1)
+
+        # Текст с значениями
+        self.texts.draw(f"{label}: {value}/{max_value}",
+                        x + width // 2, y + height // 2,
+                        WHITE, self.small_font_size,
+                        anchor_x="center", anchor_y="center",
+                        font_name=self.font_name)
+
+    # Функция отрисовки мини-карты
+    # param game_map: Объект карты игры
+    # param player: Объект игрока
+    # param entities: Реестр сущностей уровня
+    # param x: X координата левого нижнего угла мини-карты
+    # param y: Y координата левого нижнего угла мини-карты
+    # param width: Ширина мини-карты
+    # param height: Высота мини-карты
+    @traced(category="render")
+    def render_fullmap(self, game_map: GameMap, player: Entity, entities: EntityRegistry,
+                       x: int, y: int, width: int, height: int):
+        # Коэффициенты масштабирования
+        scale_x = width / game_map.width
+        scale_y = height / game_map.height
+
+        # Фон и коридоры копятся в кэше, новые клетки дописываются по мере исследования
+        minimap_key = (game_map, x, y, width, height)
+        if minimap_key != self.minimap_key:
+            self.minimap_key = minimap_key
+            self.minimap_rooms_key = None
+            self.minimap_base = arcade.shape_list.ShapeElementList()
+            self.minimap_base.append(arcade.shape_list.create_rectangle_filled(
+                x + width / 2, y + height / 2, width, height, (20, 15, 20)))
+            self.minimap_base.append(arcade.shape_list.create_rectangle_outline(
+                x + width / 2, y + height / 2, width, height, GRAY, 1))
+            game_map.pop_newly_explored()
+            new_cells = game_map.explored.nonzero_cells()
+        else:
+            new_cells = game_map.pop_newly_explored()
+
+        # Отрисовка коридоров: исследованные проходимые клетки вне комнат
+        corridor_width = max(1, int(scale_x))
+        corridor_height = max(1, int(scale_y))
+        for mx, my in new_cells:
+            if game_map.tiles[mx][my] != TileType.WALL and game_map.get_room_at(mx, my) is None:
+                px = x + int(mx * scale_x)
+                py = y + int(my * scale_y)
+                self.minimap_base.append(arcade.shape_list.create_rectangle_filled(
+                    px + corridor_width / 2, py + corridor_height / 2,
+                    corridor_width, corridor_height, (50, 45, 55)))
+        self.minimap_base.draw()
+        self.perf.count_draws()
+
+        # Комнаты перерисовываются только при смене комнаты игрока или новых исследованных комнатах
+        player_room = game_map.get_room_at(player.x, player.y)
+        rooms_key = (player_room, len(game_map.explored_rooms))
+        if rooms_key != self.minimap_rooms_key:
+            self.minimap_rooms_key = rooms_key
+            self.minimap_rooms = arcade.shape_list.ShapeElementList()
+            for index, (left, bottom, room_width, room_height) in enumerate(game_map.rooms):
+                # Расчет координат комнаты на мини-карте
+                rx = x + int(left * scale_x)
+                ry = y + int(bottom * scale_y)
+                rw = max(2, int(room_width * scale_x))
+                rh = max(2, int(room_height * scale_y))
+
+                # Определение цвета комнаты
+                if index == player_room:
+                    room_color = (60, 80, 60)
+                    border_color = GREEN
+                elif index in game_map.explored_rooms:
+                    room_color = (45, 40, 50)
+                    border_color = (80, 70, 90)
+                else:
+                    room_color = (25, 22, 28)
+                    border_color = (40, 35, 45)
+
+                self.minimap_rooms.append(arcade.shape_list.create_rectangle_filled(
+                    rx + rw / 2, ry + rh / 2, rw, rh, room_color))
+                self.minimap_rooms.append(arcade.shape_list.create_rectangle_outline(
+                    rx + rw / 2, ry + rh / 2, rw, rh, border_color, 1))
+        self.minimap_rooms.draw()
+        self.perf.count_draws()
+
+        # Отрисовка выхода на мини-карте
+        if game_map.exit_pos:
+            ex = x + int(game_map.exit_pos[0] * scale_x)
+            ey = y + int(game_map.exit_pos[1] * scale_y)
+            self.draw_lbwh_rectangle_filled(ex + 2, ey + 2, 4, 4, GREEN)
+
+        # Отрисовка видимых врагов на мини-карте
+        for entity in game_map.visible_entities((FACTION_IMMUNE,)):
+            ex = x + int(entity.x * scale_x)
+            ey = y + int(entity.y * scale_y)
+            self.draw_lbwh_rectangle_filled(ex + 1.5, ey + 1.5, 3, 3, RED)
+
+        # Отрисовка клонов на мини-карте
+        for entity in entities.clones:
+            cx = x + int(entity.x * scale_x)
+            cy = y + int(entity.y * scale_y)
+            self.draw_lbwh_rectangle_filled(cx + 1, cy + 1, 2, 2, (100, 200, 100))
+
+        # Отрисовка игрока на мини-карте
+        px = x + int(player.x * scale_x)
+        py = y + int(player.y * scale_y)
+        self.draw_lbwh_rectangle_filled(px + 2.5, py + 2.5, 5, 5, GREEN)
+        self.draw_lbwh_rectangle_outline(px + 2.5, py + 2.5, 5, 5, WHITE, 1)
+
+        # Отображение статистики комнат
+        self.texts.draw(f"Комнат: {len(game_map.explored_rooms)}/{len(game_map.rooms)}",
+                        x + 3, y + height - 18,
+                        GRAY, self.small_font_size, font_name=self.font_name)
+
+    # Функция отрисовки меню выбора мутаций
+    # param mutations: Список доступных мутаций
+    @traced(category="render")
+    def render_evolution_menu(self, mutations: list):
+        # Затемнение фона
+        self.draw_lbwh_rectangle_filled(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2,
+                                     SCREEN_WIDTH, SCREEN_HEIGHT, (0, 0, 0, 180))
+
+        # Заголовок меню
+        self.texts.draw("ЭВОЛЮЦИЯ", SCREEN_WIDTH // 2, 100,
+                        GREEN, self.large_font_size,
+                        anchor_x="center", font_name=self.font_name)
+
+        self.texts.draw("Выберите мутацию (нажмите 1, 2 или 3)",
+                        SCREEN_WIDTH // 2, 150, WHITE, self.font_size,
+                        anchor_x="center", font_name=self.font_name)
+
+        # Отрисовка вариантов мутаций
+        for i, mutation in enumerate(mutations):
+            y_pos = 220 + i * 100
+            box_x = SCREEN_WIDTH // 2 - 200
+            box_y = y_pos
+            box_width = 400
+            box_height = 80
+
+            # Фон для варианта мутации
+            self.draw_lbwh_rectangle_filled(box_x, box_y, box_width, box_height, (40, 35, 40))
+            self.draw_lbwh_rectangle_outline(box_x, box_y, box_width, box_height, GREEN, 2)
+
+            # Номер варианта
+            self.texts.draw(str(i + 1), box_x + 20, box_y + 20,
+                            GREEN, self.large_font_size, font_name=self.font_name)
+
+            # Название мутации
+            self.texts.draw(mutation.name, box_x + 70, box_y + 15,
+                            WHITE, self.font_size, font_name=self.font_name)
+
+            # Описание мутации
+            self.texts.draw(mutation.description, box_x + 70, box_y + 45,
+                            GRAY, self.small_font_size, font_name=self.font_name)
+
+    # Функция отрисовки экрана поражения
+    # param current_level: Текущий уровень
+    # param turn_count: Количество ходов
+    @traced(category="render")
+    def render_game_over(self, current_level: int, turn_count: int):
+        # Затемнение фона
+        self.draw_lbwh_rectangle_filled(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2,
+                                     SCREEN_WIDTH, SCREEN_HEIGHT, (0, 0, 0, 200))
+
+        # Сообщение о поражении
+        self.texts.draw("ВИРУС УНИЧТОЖЕН", SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 50,
+                        RED, self.large_font_size, anchor_x="center", font_name=self.font_name)
+
+        # Статистика игры
+        self.texts.draw(f"Уровень: {current_level} | Ходы: {turn_count}",
+                        SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 20,
+                        WHITE, self.font_size, anchor_x="center", font_name=self.font_name)
+
+        # Подсказки по управлению
+        self.texts.draw("R - перезапуск | ESC - меню",
+                        SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 70,
+                        YELLOW, self.font_size, anchor_x="center", font_name=self.font_name)
+
+    # Функция отрисовки экрана победы
+    # param turn_count: Количество ходов
+    @traced(category="render")
+    def render_victory(self, turn_count: int):
+        # Затемнение фона
+        self.draw_lbwh_rectangle_filled(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2,
+                                     SCREEN_WIDTH, SCREEN_HEIGHT, (0, 0, 0, 200))
+
+        # Сообщение о победе
+        self.texts.draw("ПОБЕДА!", SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 50,
+                        GREEN, self.large_font_size, anchor_x="center", font_name=self.font_name)
+
+        self.texts.draw("Вы захватили контроль над организмом!",
+                        SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2,
+                        CYAN, self.font_size, anchor_x="center", font_name=self.font_name)
+
+        # Статистика игры
+        self.texts.draw(f"Ходы: {turn_count}",
+                        SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 40,
+                        WHITE, self.font_size, anchor_x="center", font_name=self.font_name)
+
+        # Подсказки по управлению
+        self.texts.draw("R - новая игра | ESC - меню",
+                        SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 90,
+                        YELLOW, self.font_size, anchor_x="center", font_name=self.font_name)
+
+    # Функция отрисовки экрана паузы
+    @traced(category="render")
+    def render_pause(self):
+        # Затемнение фона
+        self.draw_lbwh_rectangle_filled(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2,
+                                     SCREEN_WIDTH, SCREEN_HEIGHT, (0, 0, 0, 180))
+
+        # Сообщение о паузе
+        self.texts.draw("ПАУЗА", SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 50,
+                        WHITE, self.large_font_size, anchor_x="center", font_name=self.font_name)
+
+        # Подсказки по управлению
+        self.texts.draw("ESC - продолжение | Q - в меню",
+                        SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 20,
+                        GRAY, self.font_size, anchor_x="center", font_name=self.font_name)
+
+    # Функция отрисовки наложения производительности
+    # Текст обновляется раз в несколько кадров, чтобы значения читались и не перестраивались каждый кадр
+    # param perf: Статистика производительности
+    # param entity_count: Количество живых сущностей
+    @traced(category="render")
+    def render_perf_overlay(self, perf: PerfStats, entity_count: int):
+        x = SCREEN_WIDTH - 300
+        top = SCREEN_HEIGHT - 155
+        line_height = 18
+
+        if self.perf_frame % 15 == 0:
+            frame_ms = perf.average_ms("frame")
+            lines = [
+                f"Кадр: {frame_ms:5.1f} мс (макс {perf.max_ms('frame'):5.1f}), "
+                f"{1000 / frame_ms if frame_ms else 0:4.0f} FPS",
+                f"on_update: {perf.average_ms('update'):5.2f} мс (макс {perf.max_ms('update'):5.2f})",
+                f"on_draw:   {perf.average_ms('draw'):5.2f} мс (макс {perf.max_ms('draw'):5.2f})",
+                f"Ход врагов: {perf.average_ms('enemy_turn'):5.2f} мс (макс {perf.max_ms('enemy_turn'):5.2f})",
+                f"Ход игрока: {perf.average_ms('player_action'):5.2f} мс",
+                f"FOV: {perf.average_ms('fov'):5.2f} мс",
+                f"Вызовы отрисовки: {perf.last_draw_calls}",
+                f"Сущности: {entity_count}",
+            ]
+            while len(self.perf_labels) < len(lines):
+                index = len(self.perf_labels)
+                self.perf_labels.append(arcade.Text("", x + 8, top - 16 - index * line_height, WHITE,
+                                                    self.small_font_size - 2, font_name=DEFAULT_FONT))
+            for label, line in zip(self.perf_labels, lines):
+                if label.text != line:
+                    label.text = line
+        self.perf_frame += 1
+
+        height = len(self.perf_labels) * line_height + 10
+        self.draw_lbwh_rectangle_filled(x, top - height, 290, height, (0, 0, 0, 180))
+        for label in self.perf_labels:
+            label.draw()
+        self.perf.count_draws(len(self.perf_labels))